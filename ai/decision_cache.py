@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from config import Config
+from utils.logger import log
+
+class DecisionCache:
+    """
+    LRU + TTL cache of AI decisions keyed by a quantized market fingerprint
+
+    The fingerprint buckets the same inputs the prompt is built from (RSI,
+    trend, BB position and VWAP distance per timeframe, plus order book
+    imbalance), so a market that has not changed regime maps to the same key
+    and reuses the last decision instead of another model call. HOLD/rejected
+    outcomes are cached as None.
+    """
+
+    RSI_BUCKET = 10.0        # RSI points per bucket
+    VWAP_BAND = 0.25         # VWAP distance (%) per band
+    IMBALANCE_BAND = 0.2     # Order book imbalance per band
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        self.max_entries = max_entries or Config.DECISION_CACHE_SIZE
+        self.ttl = ttl or Config.DECISION_CACHE_TTL
+        # (symbol, fingerprint) -> (stored_at, decision)
+        self.entries: "OrderedDict[Tuple, Tuple[float, Optional[Dict]]]" = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    @classmethod
+    def fingerprint(cls, market_data: Dict) -> Tuple:
+        """Quantized regime of a symbol's prompt inputs"""
+        parts = []
+        for tf, indicators in sorted(market_data.get('indicators', {}).items()):
+            if not indicators:
+                continue
+            parts.append((
+                tf,
+                int(indicators.get('rsi', 50) // cls.RSI_BUCKET),
+                indicators.get('trend'),
+                indicators.get('bb_position'),
+                int(indicators.get('vwap_dist', 0) // cls.VWAP_BAND)
+            ))
+
+        ob = market_data.get('market_data', {}).get('orderbook_analysis', {})
+        imbalance_band = int(ob['imbalance'] // cls.IMBALANCE_BAND) if 'imbalance' in ob else None
+        return tuple(parts), imbalance_band
+
+    def get(self, symbol: str, market_data: Dict) -> Tuple[bool, Optional[Dict]]:
+        """(hit, decision) for the symbol's current regime"""
+        key = (symbol, self.fingerprint(market_data))
+        entry = self.entries.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return False, None
+
+        stored_at, decision = entry
+        if time.time() - stored_at > self.ttl:
+            del self.entries[key]
+            self.counters["expired"] += 1
+            self.counters["misses"] += 1
+            return False, None
+
+        self.entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return True, decision
+
+    def put(self, symbol: str, market_data: Dict, decision: Optional[Dict]):
+        """Store the decision for the symbol's current regime"""
+        key = (symbol, self.fingerprint(market_data))
+        self.entries[key] = (time.time(), decision)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def stats(self) -> Dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "size": len(self.entries),
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        log.info(f"Decision cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), {stats['size']} entries, {stats['evictions']} evictions")
@@ -1,6 +1,9 @@
-from typing import Dict, Optional
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 from ai.deepseek_client import DeepSeekClient
 from ai.prompts import PromptGenerator
+from ai.decision_cache import DecisionCache
 from utils.logger import log
 from config import Config
 
@@ -8,6 +11,8 @@ class DecisionEngine:
     def __init__(self):
         self.ai_client = DeepSeekClient()
         self.prompt_generator = PromptGenerator()
+        # Reuses decisions while a market stays in the same quantized regime
+        self.decision_cache = DecisionCache() if Config.DECISION_CACHE_ENABLED else None
 
     async def evaluate_market(self, symbol: str, market_data: Dict) -> Optional[Dict]:
         """
@@ -42,55 +47,176 @@ class DecisionEngine:
         Evaluate multiple markets in a single AI call
         Returns dict of {symbol: decision}
         """
+        results, misses = self._split_cached(symbols_data)
+        if misses:
+            results.update(await self._evaluate_batch(misses))
+        return results
+
+    async def evaluate_markets_concurrently(self, symbols_data: Dict, batch_size: int = None, concurrency: int = None, excluded: Optional[Set[str]] = None) -> AsyncIterator[Dict[str, Optional[Dict]]]:
+        """
+        Fan-out mode: split symbols into batches of at most `batch_size` and
+        evaluate them concurrently (at most `concurrency` AI calls in flight)
+        Yields {symbol: decision} dicts as decisions arrive (per symbol when streaming)
+        Symbols left out of a prompt by the token budget are added to `excluded`.
+        """
+        batch_size = batch_size or Config.AI_BATCH_SIZE
+        semaphore = asyncio.Semaphore(concurrency or Config.AI_MAX_CONCURRENCY)
+
+        # Cached decisions are available right away; only the rest goes to the model
+        cached, symbols_data = self._split_cached(symbols_data)
+        if cached:
+            yield cached
+        symbols = list(symbols_data)
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run(batch: List[str]):
+            try:
+                async with semaphore:
+                    async for symbol, decision in self._stream_batch({symbol: symbols_data[symbol] for symbol in batch}, excluded):
+                        queue.put_nowait({symbol: decision})
+            finally:
+                queue.put_nowait(None)  # Batch finished
+
+        tasks = [
+            asyncio.create_task(run(symbols[i:i + batch_size]))
+            for i in range(0, len(symbols), batch_size)
+        ]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            # Consumer stopped early (or failed): don't leave AI calls running
+            for task in tasks:
+                task.cancel()
+
+    def _split_cached(self, symbols_data: Dict) -> Tuple[Dict[str, Optional[Dict]], Dict]:
+        """Split into cached {symbol: decision} for unchanged regimes and the symbols that still need the AI"""
+        if not self.decision_cache:
+            return {}, symbols_data
+
+        cached, misses = {}, {}
+        for symbol, market_data in symbols_data.items():
+            hit, decision = self.decision_cache.get(symbol, market_data)
+            if hit and decision is not None and not self._still_valid(decision, market_data):
+                hit = False
+            if hit:
+                cached[symbol] = decision
+            else:
+                misses[symbol] = market_data
+
+        if cached:
+            log.info(f"Reusing cached AI decisions for {', '.join(cached)}")
+            self.decision_cache.log_stats()
+        return cached, misses
+
+    def _still_valid(self, decision: Dict, market_data: Dict) -> bool:
+        """A cached trade signal is only reused close to its entry price and if it still passes validation"""
+        last = market_data['market_data']['ticker'].get('last')
+        entry = decision.get('entry_price')
+        if not last or not entry:
+            return False
+        if abs(last - entry) / entry > Config.DECISION_CACHE_PRICE_TOLERANCE:
+            return False
+        return self._validate_decision(decision, market_data)
+
+    def _build_prompt(self, symbols_data: Dict) -> Tuple[str, List[str]]:
+        """Combined prompt asking for one decision per symbol; returns (prompt, symbols included)"""
+        if Config.AI_PROMPT_FORMAT == "compact":
+            return self.prompt_generator.format_compact(symbols_data)
+
+        combined_prompt = "Analyze the following markets and provide trading decisions for each:\n\n"
+        for symbol, market_data in symbols_data.items():
+            combined_prompt += f"\n=== {symbol} ===\n"
+            combined_prompt += self.prompt_generator.format_market_data(symbol, market_data)
+            combined_prompt += "\n"
+        
+        combined_prompt += "\n\nRespond with a JSON object where keys are symbols and values are decision objects:"
+        combined_prompt += '\n{"BTC-USDT-SWAP": {"action":"BUY","confidence":80,...}, "ETH-USDT-SWAP": {"action":"HOLD",...}}'
+        return combined_prompt, list(symbols_data)
+
+    async def _evaluate_batch(self, symbols_data: Dict) -> Dict[str, Optional[Dict]]:
+        """One AI call for a group of symbols; returns validated {symbol: decision}"""
+        return {symbol: decision async for symbol, decision in self._stream_batch(symbols_data)}
+
+    async def _stream_batch(self, symbols_data: Dict, excluded: Optional[Set[str]] = None) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        """
+        One AI call for a group of symbols; yields validated (symbol, decision)
+        With AI_STREAMING each decision is yielded as soon as its JSON object is complete
+        Symbols the prompt token budget left out are added to `excluded`
+        """
         try:
             if not symbols_data:
-                return {}
+                return
             
-            # Format data for all symbols
-            combined_prompt = "Analyze the following markets and provide trading decisions for each:\n\n"
-            for symbol, market_data in symbols_data.items():
-                combined_prompt += f"\n=== {symbol} ===\n"
-                combined_prompt += self.prompt_generator.format_market_data(symbol, market_data)
-                combined_prompt += "\n"
+            # Get AI analysis for all symbols of the batch
+            prompt, included = self._build_prompt(symbols_data)
+            if excluded is not None:
+                excluded.update(set(symbols_data) - set(included))
+            if not included:
+                return
+            tokens = self.prompt_generator.estimate_tokens(prompt)
+            started = time.monotonic()
+            first_latency = None
             
-            combined_prompt += "\n\nRespond with a JSON object where keys are symbols and values are decision objects:"
-            combined_prompt += '\n{"BTC-USDT-SWAP": {"action":"BUY","confidence":80,...}, "ETH-USDT-SWAP": {"action":"HOLD",...}}'
+            if Config.AI_STREAMING:
+                decisions = self.ai_client.stream_market(prompt)
+            else:
+                decisions = self._iter_decisions(await self.ai_client.analyze_market(prompt))
             
-            # Get AI analysis for all symbols
-            decisions_dict = await self.ai_client.analyze_market(combined_prompt)
-            
-            if not decisions_dict:
-                return {}
-            
-            # Validate each decision
-            results = {}
-            for symbol, decision in decisions_dict.items():
-                if decision and symbol in symbols_data:
-                    # Log the AI's decision
-                    log.info(f"{symbol}: AI Decision - Action: {decision.get('action')}, Confidence: {decision.get('confidence')}%, Reasoning: {decision.get('reasoning', 'N/A')[:100]}")
-                    
-                    # Validate
-                    if self._validate_decision(decision, symbols_data[symbol]):
-                        results[symbol] = decision
-                    else:
-                        results[symbol] = None
-                else:
-                    results[symbol] = None
+            async for symbol, decision in decisions:
+                if first_latency is None:
+                    first_latency = time.monotonic() - started
+                yield symbol, self._accept_decision(symbol, decision, symbols_data)
             
-            return results
+            first = f"first decision after {first_latency:.1f}s, " if first_latency is not None else ""
+            log.info(f"AI call for {len(included)} symbols: ~{tokens} prompt tokens ({Config.AI_PROMPT_FORMAT}), {first}{time.monotonic() - started:.1f}s total")
             
         except Exception as e:
             log.error(f"Error in multi-market evaluation: {e}")
-            return {}
+
+    @staticmethod
+    async def _iter_decisions(decisions_dict: Optional[Dict]) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        """(symbol, decision) pairs of a complete (non-streamed) reply"""
+        if isinstance(decisions_dict, dict):
+            for symbol, decision in decisions_dict.items():
+                yield symbol, decision
+
+    def _accept_decision(self, symbol: str, decision: Optional[Dict], symbols_data: Dict) -> Optional[Dict]:
+        """Validate one symbol's decision and remember model answers in the decision cache"""
+        result = None
+        if decision and symbol in symbols_data:
+            # Log the AI's decision
+            log.info(f"{symbol}: AI Decision - Action: {decision.get('action')}, Confidence: {decision.get('confidence')}%, Reasoning: {decision.get('reasoning', 'N/A')[:100]}")
+            
+            # Validate
+            if self._validate_decision(decision, symbols_data[symbol]):
+                result = decision
+        
+        # Only real model answers are cached; a rejected or repaired fragment goes back to the model next time
+        if self.decision_cache and symbol in symbols_data and decision and not decision.get("repaired"):
+            self.decision_cache.put(symbol, symbols_data[symbol], result)
+        return result
 
     def _validate_decision(self, decision: Dict, market_data: Dict) -> bool:
         """
         Validate AI decision against hard rules
         """
         try:
-            action = decision.get("action", "").upper()
+            action = str(decision.get("action", "")).upper()
             
-            if action == "HOLD":
+            if action not in ("BUY", "SELL"):
+                return False
+            # Downstream code compares against the upper-case action
+            decision["action"] = action
+
+            # Rule 0: never trade on a reply that had to be repaired
+            if decision.get("repaired"):
+                log.info(f"Signal rejected: AI decision was repaired from malformed/truncated JSON")
                 return False
 
             # Rule 1: Confidence Check
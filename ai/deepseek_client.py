@@ -1,18 +1,23 @@
 import aiohttp
 import asyncio
 import json
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Optional, Tuple
 from config import Config
 from utils.logger import log
+from utils.http_pool import http_pool
+from ai.json_stream import DecisionStreamParser
+from ai.model_router import ModelRouter
 
 class DeepSeekClient:
     def __init__(self):
         self.api_key = Config.DEEPSEEK_API_KEY
         self.model = Config.DEEPSEEK_MODEL
         # Use OpenRouter endpoint instead of DeepSeek direct
-        self.base_url = "https://openrouter.ai/api/v1"
+        self.base_url = Config.DEEPSEEK_BASE_URL
         # Fallback model if primary fails
         self.fallback_model = "deepseek/deepseek-chat"
+        # Tracks per-model latency/errors; hedges slow requests and skips failing models
+        self.router = ModelRouter([self.model, self.fallback_model])
 
     async def analyze_market(self, prompt: str) -> Optional[Dict]:
         """
@@ -23,99 +28,177 @@ class DeepSeekClient:
             log.error("DeepSeek API key not configured")
             return None
 
+        async def once(model: str):
+            result = await self._call_api(prompt, model, timeout=self._timeout(model))
+            if result:
+                yield result
+
         try:
             log.info("Sending analysis request to DeepSeek AI...")
             
-            # Try primary model first (R1)
-            result = await self._call_api(prompt, self.model, timeout=60)
-            if result:
-                return result
-            
-            # If primary fails, try fallback (v3)
-            if self.model != self.fallback_model:
-                log.warning(f"Primary model {self.model} failed, trying fallback {self.fallback_model}")
-                result = await self._call_api(prompt, self.fallback_model, timeout=30)
-                if result:
+            # Fastest healthy model first, hedged with the other one past its p95 latency
+            results = self.router.stream(once)
+            try:
+                async for result in results:
                     return result
+            finally:
+                await results.aclose()
             
             return None
             
         except Exception as e:
             log.error(f"DeepSeek API error: {e}")
             return None
+
+    def _timeout(self, model: str) -> int:
+        """Request timeout: primary (R1) may think for long, the fallback (v3) should be quick"""
+        return 60 if model == self.model else 30
     
+    def _request_parts(self, prompt: str, model: str) -> Tuple[Dict, Dict]:
+        """Headers and chat-completions payload for a prompt"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system", 
+                    "content": "You are a JSON-only API. You MUST respond with valid JSON only. Never include explanations, markdown, or any text outside the JSON object. Your response must be parseable by json.loads()."
+                },
+                {
+                    "role": "user", 
+                    "content": prompt + "\n\nREMINDER: Respond with ONLY valid JSON. No text before or after the JSON object."
+                }
+            ],
+            "temperature": 0.3  # Lower temperature for more consistent JSON output
+        }
+        return headers, payload
+
     async def _call_api(self, prompt: str, model: str, timeout: int = 60) -> Optional[Dict]:
         """Internal method to call the API with a specific model"""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": model,
-                "messages": [
-                    {
-                        "role": "system", 
-                        "content": "You are a JSON-only API. You MUST respond with valid JSON only. Never include explanations, markdown, or any text outside the JSON object. Your response must be parseable by json.loads()."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt + "\n\nREMINDER: Respond with ONLY valid JSON. No text before or after the JSON object."
-                    }
-                ],
-                "temperature": 0.3  # Lower temperature for more consistent JSON output
-            }
+            headers, payload = self._request_parts(prompt, model)
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=timeout)
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        log.error(f"DeepSeek API error ({response.status}) for model {model}: {error_text}")
-                        return None
-                    
-                    data = await response.json()
-                    
-                    # Check if response has the expected structure
-                    if "choices" not in data or not data["choices"]:
-                        log.error(f"Unexpected API response structure from {model}: {data}")
-                        return None
-                    
-                    content = data["choices"][0]["message"]["content"]
-                    
-                    # Log the raw content for debugging
-                    if not content or content.strip() == "":
-                        log.error(f"Empty response from {model}")
-                        return None
-                    
-                    # Try to extract JSON if wrapped in markdown
-                    content = content.strip()
-                    if content.startswith("```"):
-                        # Remove markdown code blocks
-                        lines = content.split("\n")
-                        content = "\n".join(lines[1:-1]) if len(lines) > 2 else content
-                        content = content.replace("```json", "").replace("```", "").strip()
-                    
-                    log.debug(f"AI Response from {model}: {content[:200]}...")  # Log first 200 chars
-                    
-                    # Try to parse JSON
-                    try:
-                        return json.loads(content)
-                    except json.JSONDecodeError as e:
-                        log.error(f"Failed to parse AI response as JSON from {model}. Content: {content[:500]}")
-                        return None
-                    
+            session = http_pool.session(self.base_url)
+            async with session.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    log.error(f"DeepSeek API error ({response.status}) for model {model}: {error_text}")
+                    return None
+                
+                data = await response.json()
+                
+                # Check if response has the expected structure
+                if "choices" not in data or not data["choices"]:
+                    log.error(f"Unexpected API response structure from {model}: {data}")
+                    return None
+                
+                content = data["choices"][0]["message"]["content"]
+                
+                # Log the raw content for debugging
+                if not content or content.strip() == "":
+                    log.error(f"Empty response from {model}")
+                    return None
+                
+                # Try to extract JSON if wrapped in markdown
+                content = content.strip()
+                if content.startswith("```"):
+                    # Remove markdown code blocks
+                    lines = content.split("\n")
+                    content = "\n".join(lines[1:-1]) if len(lines) > 2 else content
+                    content = content.replace("```json", "").replace("```", "").strip()
+                
+                log.debug(f"AI Response from {model}: {content[:200]}...")  # Log first 200 chars
+                
+                # Try to parse JSON
+                try:
+                    return json.loads(content)
+                except json.JSONDecodeError as e:
+                    log.error(f"Failed to parse AI response as JSON from {model}. Content: {content[:500]}")
+                    return None
+                
         except aiohttp.ClientError as e:
             log.error(f"DeepSeek API connection error for model {model}: {e}")
             return None
         except asyncio.TimeoutError:
-            log.warning(f"DeepSeek API timeout for model {model} (may be thinking) - trying fallback")
+            log.warning(f"DeepSeek API timeout for model {model} (may be thinking)")
             return None
         except Exception as e:
             log.error(f"DeepSeek API error for model {model}: {e}")
             return None
+
+    async def stream_market(self, prompt: str) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        """
+        Streaming variant of analyze_market for {symbol: decision} replies
+        Yields (symbol, decision) as soon as each symbol's object is complete,
+        from whichever model (primary or hedge) produced the first decision
+        """
+        if not self.api_key:
+            log.error("DeepSeek API key not configured")
+            return
+
+        log.info("Sending streaming analysis request to DeepSeek AI...")
+        results = self.router.stream(lambda model: self._stream_api(prompt, model, timeout=self._timeout(model)))
+        try:
+            async for item in results:
+                yield item
+        finally:
+            await results.aclose()
+
+    async def _stream_api(self, prompt: str, model: str, timeout: int = 60) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        """Call the API with stream=true and parse the SSE deltas incrementally"""
+        parser = DecisionStreamParser()
+        try:
+            headers, payload = self._request_parts(prompt, model)
+            payload["stream"] = True
+            
+            session = http_pool.session(self.base_url)
+            async with session.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    log.error(f"DeepSeek API error ({response.status}) for model {model}: {error_text}")
+                    return
+                
+                async for line in response.content:
+                    line = line.strip()
+                    # SSE: "data: {...}" events; blank lines and ": comments" are keep-alives
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == b"[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                        content = chunk["choices"][0]["delta"].get("content")
+                    except (json.JSONDecodeError, KeyError, IndexError):
+                        log.debug(f"Skipping unexpected stream event from {model}: {data[:200]}")
+                        continue
+                    if content:
+                        for item in parser.feed(content):
+                            yield item
+                    
+        except aiohttp.ClientError as e:
+            log.error(f"DeepSeek API connection error for model {model}: {e}")
+        except asyncio.TimeoutError:
+            log.warning(f"DeepSeek API stream timeout for model {model}")
+        except Exception as e:
+            log.error(f"DeepSeek API error for model {model}: {e}")
+        
+        # Whatever was cut off (timeout, dropped connection, max tokens) is repaired or rejected per symbol
+        for item in parser.finish():
+            yield item
+        if parser.repaired or parser.rejected:
+            log.info(f"Stream from {model}: {len(parser.emitted)} decisions, {parser.repaired} repaired, {parser.rejected} rejected")
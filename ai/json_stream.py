@@ -0,0 +1,187 @@
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+from utils.logger import log
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+class DecisionStreamParser:
+    """
+    Incremental parser for a streamed {"SYMBOL": {...decision...}, ...} reply
+
+    feed() takes text chunks as they arrive and returns every (symbol,
+    decision) whose object has closed since the last call, so decisions can
+    be acted on before the model finishes. Anything before the first '{'
+    (markdown fences, stray text) is skipped. A member that does not parse
+    is repaired if possible and otherwise rejected as (symbol, None), without
+    affecting the other symbols. finish() handles an object cut off by the
+    end of the stream. Repaired decisions carry "repaired": True and are
+    never executed (see DecisionEngine._validate_decision).
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.key: Optional[str] = None
+        self.key_start: Optional[int] = None
+        self.value_start: Optional[int] = None
+        self.emitted: List[str] = []
+        self.repaired = 0
+        self.rejected = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Optional[Dict]]]:
+        """Consume a chunk; returns decisions completed by it"""
+        self.buffer += chunk
+        out: List[Tuple[str, Optional[Dict]]] = []
+        buffer = self.buffer
+
+        while self.pos < len(buffer):
+            ch = buffer[self.pos]
+            i = self.pos
+            self.pos += 1
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.value_start is None and self.key_start is not None:
+                        # End of a top-level key
+                        self.key = buffer[self.key_start:i]
+                        self.key_start = None
+                continue
+
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.value_start is None and self.key is None:
+                    self.key_start = i + 1
+            elif ch in "{[":
+                if self.depth == 1 and self.key is not None and self.value_start is None:
+                    self.value_start = i
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 1 and self.value_start is not None:
+                    out.append(self._emit(buffer[self.value_start:i + 1]))
+                elif self.depth == 0:
+                    # End of the top-level object; ignore anything after it
+                    if self.key is not None and self.value_start is None:
+                        out.append((self.key, None))
+                        self.emitted.append(self.key)
+                        self.key = None
+                    self.pos = len(buffer)
+            elif ch == "," and self.depth == 1 and self.key is not None and self.value_start is None:
+                # Scalar member value (e.g. null): no decision for this symbol
+                out.append((self.key, None))
+                self.emitted.append(self.key)
+                self.key = None
+
+        return out
+
+    def finish(self) -> List[Tuple[str, Optional[Dict]]]:
+        """End of stream: repair or reject a decision left open"""
+        if self.key is None or self.key in self.emitted:
+            return []
+        if self.value_start is None:
+            self.emitted.append(self.key)
+            return [(self.key, None)]
+
+        decision = self._repair_truncated(self.buffer[self.value_start:])
+        key = self.key
+        self.key = None
+        self.value_start = None
+        self.emitted.append(key)
+        if decision is None:
+            self.rejected += 1
+            log.warning(f"{key}: truncated AI decision rejected")
+        else:
+            self.repaired += 1
+            decision["repaired"] = True
+            log.warning(f"{key}: truncated AI decision repaired")
+        return [(key, decision)]
+
+    def _emit(self, text: str) -> Tuple[str, Optional[Dict]]:
+        """Parse one complete member value, fixing trailing commas if needed"""
+        key = self.key
+        self.key = None
+        self.value_start = None
+        self.emitted.append(key)
+
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                value = json.loads(_TRAILING_COMMA.sub(r"\1", text))
+                self.repaired += 1
+                if isinstance(value, dict):
+                    value["repaired"] = True
+            except json.JSONDecodeError:
+                self.rejected += 1
+                log.warning(f"{key}: invalid AI decision JSON rejected: {text[:200]}")
+                return key, None
+
+        return key, value if isinstance(value, dict) else None
+
+    @classmethod
+    def _repair_truncated(cls, text: str) -> Optional[Dict]:
+        """
+        Close a cut-off object, dropping the member that was being written
+        A trailing number or literal may itself be cut, so it is dropped too;
+        a string that was never closed is dropped rather than closed.
+        """
+        candidate = text.rstrip()
+        if candidate and candidate[-1] not in '"}]':
+            # The last value may itself be cut short (e.g. a number): drop it
+            candidate = candidate[:max(candidate.rfind(","), 0)].rstrip()
+
+        while candidate:
+            value = cls._close_and_parse(candidate)
+            if isinstance(value, dict):
+                return value
+            # Values before a comma are complete; back off one member at a time
+            cut = candidate.rfind(",")
+            if cut <= 0:
+                return None
+            candidate = candidate[:cut].rstrip()
+        return None
+
+    @staticmethod
+    def _close_and_parse(text: str) -> Optional[Dict]:
+        """Append the brackets needed to close `text` and parse it (None if it ends inside a string)"""
+        stack = []
+        in_string = False
+        escape = False
+        for ch in text:
+            if in_string:
+                if escape:
+                    escape = False
+                elif ch == "\\":
+                    escape = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch in "{[":
+                stack.append("}" if ch == "{" else "]")
+            elif ch in "}]" and stack:
+                stack.pop()
+        if in_string:
+            # A cut-off string ("BU" of "BUY") must not pass as a complete value
+            return None
+        closed = text + "".join(reversed(stack))
+        try:
+            return json.loads(_TRAILING_COMMA.sub(r"\1", closed))
+        except json.JSONDecodeError:
+            return None
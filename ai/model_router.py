@@ -0,0 +1,189 @@
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional
+import numpy as np
+from config import Config
+from utils.logger import log
+
+_END = object()
+
+class ModelStats:
+    """Rolling latency/outcome window and circuit breaker state of one model"""
+
+    WINDOW = 50
+
+    def __init__(self):
+        self.latencies: Deque[float] = deque(maxlen=self.WINDOW)
+        self.outcomes: Deque[bool] = deque(maxlen=self.WINDOW)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.hedges = 0
+        self.wins = 0
+        # Half-open breaker: one trial request in flight
+        self.trial = False
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return float(np.percentile(self.latencies, q))
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+
+class ModelRouter:
+    """
+    Latency-aware routing over several models with hedged requests
+
+    Models are tried in order of observed p50 latency (configured order until
+    there are enough samples). If the current model has not produced a result
+    within its rolling p95, the next model is started in parallel; the first
+    model to produce a result wins and the others are cancelled. A model that
+    fails AI_BREAKER_FAILURES times in a row is skipped for AI_BREAKER_COOLDOWN
+    seconds, then gets a single trial request.
+    """
+
+    MIN_SAMPLES = 5
+
+    def __init__(self, models: List[str], hedge_delay: float = None):
+        self.models = list(dict.fromkeys(models))
+        self.hedge_delay_default = hedge_delay or Config.AI_HEDGE_DELAY
+        self.stats_by_model: Dict[str, ModelStats] = {model: ModelStats() for model in self.models}
+
+    def available(self, model: str) -> bool:
+        """Circuit closed, or open long enough to allow a trial request (and none is running)"""
+        stats = self.stats_by_model[model]
+        if stats.consecutive_failures >= Config.AI_BREAKER_FAILURES:
+            return time.time() >= stats.open_until and not stats.trial
+        return True
+
+    def order(self) -> List[str]:
+        """Available models, fastest first once every one has enough samples"""
+        models = [m for m in self.models if self.available(m)]
+        if all(len(self.stats_by_model[m].latencies) >= self.MIN_SAMPLES for m in models):
+            models.sort(key=lambda m: self.stats_by_model[m].percentile(50))
+        return models
+
+    def hedge_delay(self, model: str) -> float:
+        """Time to wait for a model before hedging: its p95, or the default until it has samples"""
+        stats = self.stats_by_model[model]
+        if len(stats.latencies) < self.MIN_SAMPLES:
+            return self.hedge_delay_default
+        return stats.percentile(95)
+
+    def record(self, model: str, latency: Optional[float], ok: bool):
+        """Record a finished request (latency to first result, None on failure)"""
+        stats = self.stats_by_model[model]
+        stats.outcomes.append(ok)
+        stats.trial = False
+        if ok:
+            stats.latencies.append(latency)
+            stats.consecutive_failures = 0
+            stats.open_until = 0.0
+            return
+
+        stats.consecutive_failures += 1
+        if stats.consecutive_failures >= Config.AI_BREAKER_FAILURES:
+            stats.open_until = time.time() + Config.AI_BREAKER_COOLDOWN
+            log.warning(f"Model {model} failed {stats.consecutive_failures} times in a row, skipping it for {Config.AI_BREAKER_COOLDOWN:.0f}s")
+
+    async def stream(self, open_stream: Callable[[str], AsyncIterator]) -> AsyncIterator:
+        """
+        Yield the results of the first model to produce one
+        open_stream(model) returns that model's async iterator of results;
+        a model that ends without results counts as failed.
+        """
+        models = self.order()
+        if not models:
+            # Every circuit is open: try the one that reopens first rather than nothing
+            models = [min(self.models, key=lambda m: self.stats_by_model[m].open_until)]
+
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks: Dict[str, asyncio.Task] = {}
+        started: Dict[str, float] = {}
+        winner: Optional[str] = None
+        failed = set()
+
+        async def pump(model: str):
+            try:
+                async for item in open_stream(model):
+                    queue.put_nowait((model, item))
+            except Exception as e:
+                log.error(f"Model {model} request failed: {e}")
+            finally:
+                queue.put_nowait((model, _END))
+
+        def launch(model: str):
+            stats = self.stats_by_model[model]
+            if stats.consecutive_failures >= Config.AI_BREAKER_FAILURES:
+                stats.trial = True
+            started[model] = time.monotonic()
+            tasks[model] = asyncio.create_task(pump(model))
+
+        pending = list(models)
+        launch(pending.pop(0))
+        try:
+            while True:
+                # Most recently started model still in flight
+                current = [m for m in tasks if m not in failed][-1]
+                timeout = None
+                if winner is None and pending:
+                    timeout = max(0.0, started[current] + self.hedge_delay(current) - time.monotonic())
+                try:
+                    model, item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    # Current model is slower than its p95: hedge with the next one
+                    hedge = pending.pop(0)
+                    self.stats_by_model[hedge].hedges += 1
+                    log.info(f"Model {current} slower than {self.hedge_delay(current):.1f}s, hedging with {hedge}")
+                    launch(hedge)
+                    continue
+
+                if item is _END:
+                    if model == winner:
+                        return
+                    if winner is None:
+                        self.record(model, None, False)
+                        failed.add(model)
+                        running = [m for m in tasks if m not in failed]
+                        if not running:
+                            if not pending:
+                                return
+                            # Nothing else in flight: go to the next model right away
+                            launch(pending.pop(0))
+                    continue
+
+                if winner is None:
+                    winner = model
+                    self.stats_by_model[model].wins += 1
+                    self.record(model, time.monotonic() - started[model], True)
+                    for other, task in tasks.items():
+                        if other != model:
+                            task.cancel()
+                if model == winner:
+                    yield item
+        finally:
+            for model, task in tasks.items():
+                if not task.done():
+                    # Cancelled before finishing: no outcome to record
+                    self.stats_by_model[model].trial = False
+                task.cancel()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Rolling p50/p95 latency, error rate and breaker state per model"""
+        return {
+            model: {
+                "p50": stats.percentile(50),
+                "p95": stats.percentile(95),
+                "error_rate": stats.error_rate,
+                "samples": len(stats.outcomes),
+                "wins": stats.wins,
+                "hedges": stats.hedges,
+                "circuit_open": not self.available(model)
+            }
+            for model, stats in self.stats_by_model.items()
+        }
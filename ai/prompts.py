@@ -1,7 +1,23 @@
 import json
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from utils.logger import log
 
 class PromptGenerator:
+    # Reply schema, stated once per prompt in the compact format
+    COMPACT_SCHEMA = '{"<symbol>":{"action":"BUY"|"SELL"|"HOLD","confidence":0-100,"reasoning":"text","entry_price":num,"stop_loss":num,"take_profit":num,"timeframe_confluence":["1m","5m"],"risk_level":"LOW"|"MEDIUM"|"HIGH"}}'
+
+    def __init__(self):
+        # Compact timeframe rows reused while their candles are unchanged: {(symbol, tf): (key, row)}
+        self.segments: Dict[Tuple[str, str], Tuple[Tuple, str]] = {}
+        self.segment_hits = 0
+        self.segment_misses = 0
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (~4 characters per token)"""
+        return len(text) // 4 + 1
+
     @staticmethod
     def format_market_data(symbol: str, data: Dict) -> str:
         """
@@ -37,10 +53,11 @@ class PromptGenerator:
                 prompt_parts.append(f"VWAP Distance: {indicators.get('vwap_dist', 0):.2f}%")
                 
                 # Volume info from candles
-                candles = data['candles'].get(tf, [])
-                if len(candles) >= 2:
-                    last_vol = candles[-1]['volume']
-                    prev_vol = candles[-2]['volume']
+                candles = data['candles'].get(tf)
+                if candles is not None and len(candles) >= 2:
+                    volumes = candles.volume
+                    last_vol = float(volumes[-1])
+                    prev_vol = float(volumes[-2])
                     vol_change = ((last_vol - prev_vol) / prev_vol * 100) if prev_vol > 0 else 0
                     prompt_parts.append(f"Volume Change: {vol_change:.1f}%")
 
@@ -52,3 +69,90 @@ class PromptGenerator:
             
         except Exception as e:
             return f"Error formatting data: {str(e)}"
+
+    def format_compact(self, symbols_data: Dict, token_budget: int = None) -> Tuple[str, List[str]]:
+        """
+        Compact tabular prompt for several symbols: one market row per symbol,
+        one row per symbol and timeframe, and the reply schema once
+        Symbols that would exceed `token_budget` are left out.
+        Returns (prompt, symbols included)
+        """
+        token_budget = token_budget or Config.AI_PROMPT_TOKEN_BUDGET
+        header = [
+            "Analyze these markets and give one trading decision per symbol.",
+            "MARKET: symbol|price|vol24h|ob_imbalance(-1 sell..+1 buy)|support|resistance",
+            "TF: symbol|tf|rsi|trend(MA5/10)|bb_position|vwap_dist%|vol_change%"
+        ]
+        footer = [
+            "",
+            "IMPORTANT: Respond with ONLY a valid JSON object keyed by symbol. No explanations, no markdown, no other text.",
+            f"Format: {self.COMPACT_SCHEMA}"
+        ]
+        used = self.estimate_tokens("\n".join(header + footer))
+
+        market_rows: List[str] = []
+        tf_rows: List[str] = []
+        included: List[str] = []
+        for symbol, data in symbols_data.items():
+            rows = self._compact_rows(symbol, data)
+            if rows is None:
+                continue
+            market_row, symbol_tf_rows = rows
+            cost = self.estimate_tokens("\n".join([market_row] + symbol_tf_rows))
+            if used + cost > token_budget:
+                log.warning(f"Prompt token budget ({token_budget}) reached, leaving out {len(symbols_data) - len(included)} symbols")
+                break
+            used += cost
+            market_rows.append(market_row)
+            tf_rows.extend(symbol_tf_rows)
+            included.append(symbol)
+
+        return "\n".join(header + market_rows + tf_rows + footer), included
+
+    def _compact_rows(self, symbol: str, data: Dict) -> Optional[Tuple[str, List[str]]]:
+        """Market row and timeframe rows of one symbol; timeframe rows come from the segment cache when possible"""
+        try:
+            ticker = data['market_data']['ticker']
+            ob = data['market_data'].get('orderbook_analysis', {})
+            if 'imbalance' in ob:
+                book = f"{ob['imbalance']:.2f}|{ob.get('nearest_support')}|{ob.get('nearest_resistance')}"
+            else:
+                book = "-|-|-"
+            market_row = f"{symbol}|{ticker.get('last')}|{ticker.get('volume24h')}|{book}"
+
+            tf_rows = []
+            for tf, indicators in data.get('indicators', {}).items():
+                if not indicators:
+                    continue
+                candles = data['candles'].get(tf)
+                if candles is not None and len(candles) >= 2:
+                    # Indicators and volume change only move when the candles do
+                    key = (candles.last_timestamp, float(candles.close[-1]), float(candles.volume[-1]), len(candles))
+                else:
+                    key = None
+
+                cached = self.segments.get((symbol, tf))
+                if key is not None and cached is not None and cached[0] == key:
+                    self.segment_hits += 1
+                    tf_rows.append(cached[1])
+                    continue
+
+                self.segment_misses += 1
+                vol_change = "-"
+                if key is not None:
+                    last_vol = float(candles.volume[-1])
+                    prev_vol = float(candles.volume[-2])
+                    vol_change = f"{((last_vol - prev_vol) / prev_vol * 100) if prev_vol > 0 else 0:.0f}"
+                row = (
+                    f"{symbol}|{tf}|{indicators.get('rsi', 50):.0f}|{indicators.get('trend', '-')}|"
+                    f"{indicators.get('bb_position', '-')}|{indicators.get('vwap_dist', 0):.2f}|{vol_change}"
+                )
+                if key is not None:
+                    self.segments[(symbol, tf)] = (key, row)
+                tf_rows.append(row)
+
+            return market_row, tf_rows
+
+        except Exception as e:
+            log.error(f"Error formatting compact rows for {symbol}: {e}")
+            return None
@@ -1,6 +1,7 @@
 import numpy as np
-from typing import Dict, List
+from typing import Dict
 from utils.logger import log
+from data.candle_buffer import CandleBuffer
 
 class TechnicalIndicators:
     @staticmethod
@@ -54,15 +55,15 @@ class TechnicalIndicators:
         return float(np.sum(prices * volumes) / np.sum(volumes))
 
     @staticmethod
-    def analyze_candles(candles: List[Dict]) -> Dict:
-        """Analyze candles and return indicators"""
-        if not candles or len(candles) < 20:
+    def analyze_candles(candles: CandleBuffer) -> Dict:
+        """Analyze candles and return indicators (reads the buffer's column views directly)"""
+        if candles is None or len(candles) < 20:
             return {}
         
-        closes = np.array([c['close'] for c in candles])
-        volumes = np.array([c['volume'] for c in candles])
-        highs = np.array([c['high'] for c in candles])
-        lows = np.array([c['low'] for c in candles])
+        closes = candles.close
+        volumes = candles.volume
+        highs = candles.high
+        lows = candles.low
         
         # Calculate typical price for VWAP
         typical_prices = (highs + lows + closes) / 3
@@ -49,3 +49,83 @@ class OrderBookAnalyzer:
         except Exception as e:
             log.error(f"Error analyzing orderbook: {e}")
             return {}
+
+    @staticmethod
+    def stack_orderbooks(orderbooks: List[Dict], levels: int = 20) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stack normalized orderbooks into (symbols x levels x 2) bid and ask arrays
+        Shorter books are zero-padded; returns (bids, asks, bid_depth, ask_depth)
+        """
+        count = len(orderbooks)
+        bids = np.zeros((count, levels, 2), dtype=np.float64)
+        asks = np.zeros((count, levels, 2), dtype=np.float64)
+        bid_depth = np.zeros(count, dtype=np.int64)
+        ask_depth = np.zeros(count, dtype=np.int64)
+
+        for i, ob in enumerate(orderbooks):
+            for side, dest, depth in (("bids", bids, bid_depth), ("asks", asks, ask_depth)):
+                levels_data = ob.get(side) if ob else None
+                if levels_data is None or len(levels_data) == 0:
+                    continue
+                n = min(len(levels_data), levels)
+                dest[i, :n] = np.asarray(levels_data[:n], dtype=np.float64)[:, :2]
+                depth[i] = n
+
+        return bids, asks, bid_depth, ask_depth
+
+    @staticmethod
+    def analyze_batch(symbols: List[str], bids: np.ndarray, asks: np.ndarray, bid_depth: np.ndarray, ask_depth: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Vectorized analyze() over many books at once
+        bids/asks: (symbols x levels x 2) [price, size], zero-padded past each book's depth
+        Returns a columnar result: one array per metric, aligned with `symbols`,
+        plus a 'valid' mask for rows that could be analyzed
+        """
+        levels = bids.shape[1]
+        index = np.arange(levels)
+        bid_mask = index[None, :] < bid_depth[:, None]
+        ask_mask = index[None, :] < ask_depth[:, None]
+        bid_px, bid_sz = bids[:, :, 0], np.where(bid_mask, bids[:, :, 1], 0.0)
+        ask_px, ask_sz = asks[:, :, 0], np.where(ask_mask, asks[:, :, 1], 0.0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Imbalance of the top 10 levels
+            bid_vol = bid_sz[:, :10].sum(axis=1)
+            ask_vol = ask_sz[:, :10].sum(axis=1)
+            imbalance = (bid_vol - ask_vol) / (bid_vol + ask_vol)
+
+            # Walls: first level larger than 2x the side's average size
+            avg_bid = bid_sz.sum(axis=1) / bid_depth
+            avg_ask = ask_sz.sum(axis=1) / ask_depth
+            bid_walls = bid_mask & (bid_sz > avg_bid[:, None] * 2)
+            ask_walls = ask_mask & (ask_sz > avg_ask[:, None] * 2)
+            rows = np.arange(len(symbols))
+            support = np.where(bid_walls.any(axis=1), bid_px[rows, bid_walls.argmax(axis=1)], bid_px[:, 0])
+            resistance = np.where(ask_walls.any(axis=1), ask_px[rows, ask_walls.argmax(axis=1)], ask_px[:, 0])
+
+            # Weighted average price of the top 5 levels
+            wap_bid = (bid_px[:, :5] * bid_sz[:, :5]).sum(axis=1) / bid_sz[:, :5].sum(axis=1)
+            wap_ask = (ask_px[:, :5] * ask_sz[:, :5]).sum(axis=1) / ask_sz[:, :5].sum(axis=1)
+
+        valid = (bid_depth > 0) & (ask_depth > 0) & np.isfinite(imbalance) & np.isfinite(wap_bid) & np.isfinite(wap_ask)
+
+        return {
+            "symbols": np.asarray(symbols),
+            "valid": valid,
+            "imbalance": imbalance,
+            "bid_volume_top10": bid_vol,
+            "ask_volume_top10": ask_vol,
+            "nearest_support": support,
+            "nearest_resistance": resistance,
+            "spread": ask_px[:, 0] - bid_px[:, 0],
+            "micro_price": (wap_bid + wap_ask) / 2
+        }
+
+    @staticmethod
+    def batch_to_dict(result: Dict[str, np.ndarray]) -> Dict[str, Dict]:
+        """Per-symbol view of an analyze_batch result, in the same format as analyze()"""
+        metrics = [k for k in result if k not in ("symbols", "valid")]
+        rows = {}
+        for i, symbol in enumerate(result["symbols"]):
+            rows[str(symbol)] = {k: float(result[k][i]) for k in metrics} if result["valid"][i] else {}
+        return rows
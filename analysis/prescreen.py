@@ -0,0 +1,98 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from config import Config
+from utils.logger import log
+
+class PreScreener:
+    """
+    Local scoring stage that decides which symbols are worth an AI call
+
+    Every symbol is scored in one numpy pass over (symbols x timeframes)
+    indicator arrays:
+    - confluence: how strongly trend, RSI momentum and VWAP distance point
+      the same way across all timeframes
+    - imbalance: order book pressure, counted double when it agrees with
+      the confluence direction
+    - volume: volume change of the latest bar on the lowest timeframe
+    - extremes: price outside the Bollinger Bands or RSI outside 30-70
+    Only the top-K symbols scoring at least PRESCREEN_MIN_SCORE go to the model.
+    """
+
+    WEIGHTS = {"confluence": 0.4, "imbalance": 0.25, "volume": 0.2, "extreme": 0.15}
+
+    @staticmethod
+    def _features(symbols_data: Dict, timeframes: List[str]) -> Dict[str, np.ndarray]:
+        """Gather the indicator inputs into (symbols x timeframes) / (symbols,) arrays"""
+        count = len(symbols_data)
+        shape = (count, len(timeframes))
+        rsi = np.full(shape, 50.0)
+        trend = np.zeros(shape)
+        vwap_dist = np.zeros(shape)
+        outside_bb = np.zeros(shape, dtype=bool)
+        imbalance = np.zeros(count)
+        vol_change = np.zeros(count)
+
+        for i, data in enumerate(symbols_data.values()):
+            indicators = data.get('indicators', {})
+            for j, tf in enumerate(timeframes):
+                values = indicators.get(tf)
+                if not values:
+                    continue
+                rsi[i, j] = values.get('rsi', 50.0)
+                trend[i, j] = 1.0 if values.get('trend') == "UP" else -1.0
+                vwap_dist[i, j] = values.get('vwap_dist', 0.0)
+                outside_bb[i, j] = values.get('bb_position') in ("ABOVE_UPPER", "BELOW_LOWER")
+
+            imbalance[i] = data['market_data'].get('orderbook_analysis', {}).get('imbalance', 0.0)
+
+            candles = data.get('candles', {}).get(timeframes[0]) if timeframes else None
+            if candles is not None and len(candles) >= 2:
+                prev_vol = float(candles.volume[-2])
+                if prev_vol > 0:
+                    vol_change[i] = float(candles.volume[-1]) / prev_vol - 1
+
+        return {
+            "rsi": rsi, "trend": trend, "vwap_dist": vwap_dist, "outside_bb": outside_bb,
+            "imbalance": imbalance, "vol_change": vol_change
+        }
+
+    @classmethod
+    def score(cls, symbols_data: Dict, timeframes: List[str] = None) -> Dict[str, float]:
+        """Pre-screen score in [0, 1] per symbol"""
+        if not symbols_data:
+            return {}
+        timeframes = timeframes or Config.TIMEFRAMES
+        f = cls._features(symbols_data, timeframes)
+
+        # Per-timeframe direction in [-1, 1]
+        momentum = np.clip((f["rsi"] - 50) / 20, -1, 1)
+        vwap = np.clip(f["vwap_dist"] / 0.5, -1, 1)
+        direction = (f["trend"] + momentum + vwap) / 3
+        bias = direction.mean(axis=1)
+        confluence = np.abs(bias)
+
+        imbalance = np.abs(f["imbalance"])
+        aligned = np.sign(f["imbalance"]) == np.sign(bias)
+        imbalance_score = np.clip(np.where(aligned, imbalance * 2, imbalance), 0, 1)
+
+        volume_score = np.clip(f["vol_change"] / 2, 0, 1)  # +200% volume scores 1
+        extreme = (f["outside_bb"] | (f["rsi"] < 30) | (f["rsi"] > 70)).mean(axis=1)
+
+        w = cls.WEIGHTS
+        total = (w["confluence"] * confluence + w["imbalance"] * imbalance_score +
+                 w["volume"] * volume_score + w["extreme"] * extreme)
+        return dict(zip(symbols_data.keys(), total.tolist()))
+
+    @classmethod
+    def select(cls, symbols_data: Dict, top_k: int = None, min_score: float = None) -> Tuple[List[str], Dict[str, float]]:
+        """Top-K symbols scoring at least min_score (best first), and all scores"""
+        top_k = top_k or Config.PRESCREEN_TOP_K
+        min_score = Config.PRESCREEN_MIN_SCORE if min_score is None else min_score
+
+        scores = cls.score(symbols_data)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        selected = [s for s in ranked if scores[s] >= min_score][:top_k]
+
+        log.info(f"Pre-screen: {len(selected)}/{len(scores)} symbols sent to AI" +
+                 (f" ({', '.join(f'{s} {scores[s]:.2f}' for s in selected)})" if selected else ""))
+        return selected, scores
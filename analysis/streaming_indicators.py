@@ -0,0 +1,185 @@
+import numpy as np
+from typing import Dict
+from data.candle_buffer import CandleBuffer
+from analysis.indicators import TechnicalIndicators
+
+class StreamingIndicators:
+    """
+    Incremental version of TechnicalIndicators.analyze_candles for one series
+
+    Keeps rolling sums (SMA5/10, Bollinger 20), a rolling gain/loss window
+    (RSI 14, simple averages like the batch calculate_rsi) and cumulative
+    price x volume over the buffer window (VWAP), so every new or revised
+    candle costs O(1).
+
+    update() must be called BEFORE the candle is written to the buffer: it
+    reads the values that leave each window (or the bar being revised) from
+    the buffer's current contents.
+    """
+
+    RSI_PERIOD = 14
+    BB_PERIOD = 20
+    BB_STD_DEV = 2
+    MIN_CANDLES = 20
+    # Full recompute every N updates to cancel floating point drift
+    RESYNC_INTERVAL = 1000
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.count = 0
+        self.last_close = 0.0
+        # Closes are accumulated relative to a reference price so the
+        # sum of squares does not lose precision at large prices
+        self._ref = 0.0
+        self._sum5 = 0.0
+        self._sum10 = 0.0
+        self._sum20 = 0.0
+        self._sumsq20 = 0.0
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._pv_sum = 0.0
+        self._vol_sum = 0.0
+        self._updates = 0
+
+    @property
+    def needs_resync(self) -> bool:
+        return self._updates >= self.RESYNC_INTERVAL
+
+    def update(self, buffer: CandleBuffer, ts: int, high: float, low: float, close: float, volume: float):
+        """Fold one candle in; replaces the newest bar if the timestamp matches"""
+        n = len(buffer)
+        if self.count == 0:
+            self._ref = close
+
+        x = close - self._ref
+        tp = (high + low + close) / 3
+        closes = buffer.close
+
+        if n > 0 and buffer.last_timestamp == ts:
+            # Revision of the still-open bar: swap its contribution out
+            old = closes[-1] - self._ref
+            dx = x - old
+            self._sum5 += dx
+            self._sum10 += dx
+            self._sum20 += dx
+            self._sumsq20 += x * x - old * old
+
+            if n >= 2:
+                prev = closes[-2]
+                self._remove_delta(closes[-1] - prev)
+                self._add_delta(close - prev)
+
+            old_tp = (buffer.high[-1] + buffer.low[-1] + closes[-1]) / 3
+            old_vol = buffer.volume[-1]
+            self._pv_sum += tp * volume - old_tp * old_vol
+            self._vol_sum += volume - old_vol
+        else:
+            self._sum5 += x - (closes[n - 5] - self._ref if n >= 5 else 0.0)
+            self._sum10 += x - (closes[n - 10] - self._ref if n >= 10 else 0.0)
+            if n >= self.BB_PERIOD:
+                out = closes[n - self.BB_PERIOD] - self._ref
+                self._sum20 += x - out
+                self._sumsq20 += x * x - out * out
+            else:
+                self._sum20 += x
+                self._sumsq20 += x * x
+
+            if n >= 1:
+                self._add_delta(close - closes[-1])
+            if n >= self.RSI_PERIOD + 1:
+                self._remove_delta(closes[n - self.RSI_PERIOD] - closes[n - self.RSI_PERIOD - 1])
+
+            self._pv_sum += tp * volume
+            self._vol_sum += volume
+            if n == buffer.capacity:
+                # The oldest bar is evicted from the VWAP window
+                self._pv_sum -= (buffer.high[0] + buffer.low[0] + closes[0]) / 3 * buffer.volume[0]
+                self._vol_sum -= buffer.volume[0]
+            else:
+                self.count += 1
+
+        self.last_close = close
+        self._updates += 1
+
+    def _add_delta(self, delta: float):
+        if delta > 0:
+            self._gain_sum += delta
+        elif delta < 0:
+            self._loss_sum -= delta
+
+    def _remove_delta(self, delta: float):
+        if delta > 0:
+            self._gain_sum -= delta
+        elif delta < 0:
+            self._loss_sum += delta
+
+    def rebuild(self, buffer: CandleBuffer):
+        """Recompute all rolling state from the buffer contents (O(window))"""
+        self._reset()
+        n = len(buffer)
+        if n == 0:
+            return
+
+        closes = buffer.close
+        self.count = n
+        self.last_close = float(closes[-1])
+        self._ref = float(closes[-1])
+
+        shifted = closes - self._ref
+        self._sum5 = float(np.sum(shifted[-5:]))
+        self._sum10 = float(np.sum(shifted[-10:]))
+        self._sum20 = float(np.sum(shifted[-self.BB_PERIOD:]))
+        self._sumsq20 = float(np.sum(shifted[-self.BB_PERIOD:] ** 2))
+
+        deltas = np.diff(closes)[-self.RSI_PERIOD:]
+        self._gain_sum = float(np.sum(deltas[deltas > 0]))
+        self._loss_sum = float(-np.sum(deltas[deltas < 0]))
+
+        typical_prices = (buffer.high + buffer.low + closes) / 3
+        self._pv_sum = float(np.sum(typical_prices * buffer.volume))
+        self._vol_sum = float(np.sum(buffer.volume))
+
+    def snapshot(self) -> Dict:
+        """Current indicator values, same keys as TechnicalIndicators.analyze_candles"""
+        if self.count < self.MIN_CANDLES:
+            return {}
+
+        if self.count < self.RSI_PERIOD + 1:
+            rsi = 50.0
+        else:
+            avg_gain = max(self._gain_sum, 0.0) / self.RSI_PERIOD
+            avg_loss = max(self._loss_sum, 0.0) / self.RSI_PERIOD
+            if avg_loss <= 1e-12:
+                rsi = 100.0
+            else:
+                rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        sma_5 = self._ref + self._sum5 / 5
+        sma_10 = self._ref + self._sum10 / 10
+
+        mean20 = self._sum20 / self.BB_PERIOD
+        std = float(np.sqrt(max(self._sumsq20 / self.BB_PERIOD - mean20 * mean20, 0.0)))
+        middle = self._ref + mean20
+        bb = {
+            "upper": middle + self.BB_STD_DEV * std,
+            "middle": middle,
+            "lower": middle - self.BB_STD_DEV * std
+        }
+
+        vwap = self._pv_sum / self._vol_sum if self._vol_sum > 0 else 0.0
+        current_price = self.last_close
+
+        return {
+            "rsi": float(rsi),
+            "sma_5": float(sma_5),
+            "sma_10": float(sma_10),
+            "trend": "UP" if sma_5 > sma_10 else "DOWN",
+            "bb_upper": float(bb["upper"]),
+            "bb_middle": float(bb["middle"]),
+            "bb_lower": float(bb["lower"]),
+            "bb_position": TechnicalIndicators._get_bb_position(current_price, bb),
+            "vwap": float(vwap),
+            "vwap_dist": ((current_price - vwap) / current_price * 100) if vwap > 0 else 0
+        }
@@ -0,0 +1,156 @@
+"""
+AI decision path latency benchmark (offline)
+
+Starts benchmarks.fake_llm_server in-process, points the DeepSeek client at
+it and drives DecisionEngine with synthetic market data for 2, 20 and 200
+symbols. Reports per-decision latency percentiles (time from the start of the
+evaluation until each symbol's decision is available) and decision throughput.
+
+Modes:
+    single      evaluate_multiple_markets (one AI call for all symbols)
+    concurrent  evaluate_markets_concurrently (batched fan-out, decisions as they arrive)
+
+Usage:
+    python -m benchmarks.ai_latency_benchmark --mode both --format compact --stream
+    python -m benchmarks.ai_latency_benchmark --symbols 20 --latency-ms 1500 --malformed-rate 0.1
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from typing import Dict, List
+import numpy as np
+from config import Config
+from data.candle_buffer import CandleBuffer
+from analysis.indicators import TechnicalIndicators
+from utils.http_pool import http_pool
+from utils.logger import log
+from benchmarks.fake_llm_server import FakeLLMServer
+
+def make_symbols_data(count: int, timeframes: List[str], bars: int = 100) -> Dict:
+    """Synthetic consolidated state (random-walk candles, indicators, ticker) per symbol"""
+    symbols_data = {}
+    for i in range(count):
+        symbol = f"COIN{i}-USDT-SWAP"
+        price = random.uniform(0.5, 50000)
+        candles = {}
+        indicators = {}
+        for tf in timeframes:
+            buffer = CandleBuffer(bars)
+            close = price * (1 + np.cumsum(np.random.normal(0, 0.002, bars)))
+            volume = np.random.uniform(100, 1000, bars)
+            for j in range(bars):
+                c = float(close[j])
+                buffer.append(1700000000000 + j * 60000, c, c * 1.001, c * 0.999, c, float(volume[j]), True)
+            candles[tf] = buffer
+            indicators[tf] = TechnicalIndicators.analyze_candles(buffer)
+
+        last = float(candles[timeframes[0]].close[-1])
+        symbols_data[symbol] = {
+            "symbol": symbol,
+            "market_data": {
+                "ticker": {"last": round(last, 6), "volume24h": round(random.uniform(1e5, 1e8), 2)},
+                "orderbook_analysis": {
+                    "imbalance": random.uniform(-1, 1),
+                    "nearest_support": round(last * 0.995, 6),
+                    "nearest_resistance": round(last * 1.005, 6)
+                }
+            },
+            "candles": candles,
+            "indicators": indicators
+        }
+    return symbols_data
+
+
+async def run_single(engine, symbols_data: Dict) -> List[float]:
+    """Decision latencies of one evaluate_multiple_markets call"""
+    started = time.monotonic()
+    decisions = await engine.evaluate_multiple_markets(symbols_data)
+    elapsed = time.monotonic() - started
+    return [elapsed] * len(decisions)
+
+
+async def run_concurrent(engine, symbols_data: Dict) -> List[float]:
+    """Decision latencies of one evaluate_markets_concurrently pass"""
+    started = time.monotonic()
+    latencies = []
+    async for decisions in engine.evaluate_markets_concurrently(symbols_data):
+        latencies.extend([time.monotonic() - started] * len(decisions))
+    return latencies
+
+
+def report(label: str, latencies: List[float], requested: int, wall: float):
+    if not latencies:
+        print(f"{label:<34} no decisions")
+        return
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{label:<34} {len(latencies):>5}/{requested:<5} p50 {p50:6.2f}s  p95 {p95:6.2f}s  p99 {p99:6.2f}s  "
+          f"{len(latencies) / wall:7.1f} decisions/s")
+
+
+async def benchmark(args):
+    server = FakeLLMServer(args.latency_ms, args.jitter, args.per_symbol_ms, args.malformed_rate,
+                           args.timeout_rate, args.signal_rate, seed=args.seed)
+    Config.DEEPSEEK_BASE_URL = await server.start()
+    Config.DEEPSEEK_API_KEY = Config.DEEPSEEK_API_KEY or "benchmark"
+    Config.AI_PROMPT_FORMAT = args.format
+    Config.AI_STREAMING = args.stream
+    Config.DECISION_CACHE_ENABLED = args.cache
+    # Generous budget so large batches are not cut by the prompt token budget
+    Config.AI_PROMPT_TOKEN_BUDGET = max(Config.AI_PROMPT_TOKEN_BUDGET, 200000)
+
+    # Imported after the endpoint is configured (the client reads it at construction)
+    from ai.decision_engine import DecisionEngine
+    engine = DecisionEngine()
+
+    modes = ["single", "concurrent"] if args.mode == "both" else [args.mode]
+    runners = {"single": run_single, "concurrent": run_concurrent}
+    print(f"format={args.format} stream={args.stream} cache={args.cache} "
+          f"latency={args.latency_ms:.0f}ms+{args.per_symbol_ms:.0f}ms/symbol "
+          f"malformed={args.malformed_rate:.0%} timeouts={args.timeout_rate:.0%}")
+
+    try:
+        for count in args.symbols:
+            symbols_data = make_symbols_data(count, Config.TIMEFRAMES)
+            for mode in modes:
+                latencies = []
+                started = time.monotonic()
+                for _ in range(args.rounds):
+                    latencies.extend(await runners[mode](engine, symbols_data))
+                wall = time.monotonic() - started
+                report(f"{mode} {count} symbols x{args.rounds}", latencies, count * args.rounds, wall)
+        print(f"fake server requests: {server.requests}, prompt segment cache: "
+              f"{engine.prompt_generator.segment_hits} hits / {engine.prompt_generator.segment_misses} misses")
+    finally:
+        await http_pool.close_all()
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, nargs="+", default=[2, 20, 200])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--mode", choices=["single", "concurrent", "both"], default="both")
+    parser.add_argument("--format", choices=["compact", "verbose"], default=Config.AI_PROMPT_FORMAT)
+    parser.add_argument("--stream", action=argparse.BooleanOptionalAction, default=Config.AI_STREAMING)
+    parser.add_argument("--cache", action="store_true", help="keep the decision cache enabled")
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--per-symbol-ms", type=float, default=150)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--signal-rate", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose-log", action="store_true", help="keep INFO logging from the bot")
+    args = parser.parse_args()
+
+    if not args.verbose_log:
+        # Benchmark output only: console warnings, no bot log files
+        log.remove()
+        log.add(sys.stderr, level="WARNING")
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
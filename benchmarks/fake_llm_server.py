@@ -0,0 +1,163 @@
+"""
+Offline stand-in for an OpenAI-compatible chat-completions endpoint
+
+Answers POST /v1/chat/completions with one decision per symbol found in the
+prompt (compact MARKET rows or verbose "=== SYMBOL ===" headers), with
+configurable latency, streaming (SSE), malformed JSON and timeouts, so the AI
+path can be load-tested without spending tokens.
+
+Usage:
+    python -m benchmarks.fake_llm_server --port 8088 --latency-ms 800 --per-symbol-ms 150
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8088/v1 DEEPSEEK_API_KEY=test python bot.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from aiohttp import web
+
+_COMPACT_ROW = re.compile(r"^([A-Z0-9]+-[A-Z0-9-]+)\|([0-9.eE+-]+)\|", re.MULTILINE)
+_VERBOSE_HEADER = re.compile(r"^=== (\S+) ===$", re.MULTILINE)
+_VERBOSE_PRICE = re.compile(r"^Price: ([0-9.eE+-]+)$", re.MULTILINE)
+
+
+class FakeLLMServer:
+    """
+    Latency model: total time = base (log-normal around latency_ms) plus
+    per_symbol_ms for every symbol in the prompt; a streamed reply spreads
+    that time evenly over its chunks, as a generating model would.
+    """
+
+    def __init__(self, latency_ms: float = 800, jitter: float = 0.3, per_symbol_ms: float = 150,
+                 malformed_rate: float = 0.0, timeout_rate: float = 0.0, signal_rate: float = 0.3,
+                 chunk_chars: int = 24, model_latency: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.per_symbol_ms = per_symbol_ms
+        self.malformed_rate = malformed_rate
+        self.timeout_rate = timeout_rate
+        self.signal_rate = signal_rate
+        self.chunk_chars = chunk_chars
+        # Optional latency multiplier per model name, e.g. to make the primary slower than the fallback
+        self.model_latency = model_latency or {}
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.runner: Optional[web.AppRunner] = None
+
+    @staticmethod
+    def parse_symbols(prompt: str) -> List[Tuple[str, float]]:
+        """(symbol, last price) pairs requested by a compact or verbose prompt"""
+        rows = [(symbol, float(price)) for symbol, price in _COMPACT_ROW.findall(prompt)]
+        if rows:
+            return rows
+        symbols = _VERBOSE_HEADER.findall(prompt)
+        prices = [float(p) for p in _VERBOSE_PRICE.findall(prompt)]
+        return [(symbol, prices[i] if i < len(prices) else 100.0) for i, symbol in enumerate(symbols)]
+
+    def decision(self, price: float) -> Dict:
+        """Random but well-formed decision; a share of them pass the engine's validation"""
+        if self.random.random() >= self.signal_rate:
+            return {"action": "HOLD", "confidence": self.random.randint(20, 70), "reasoning": "No clear setup"}
+        side = self.random.choice(["BUY", "SELL"])
+        risk = price * 0.002
+        sign = 1 if side == "BUY" else -1
+        return {
+            "action": side,
+            "confidence": self.random.randint(75, 95),
+            "reasoning": "Synthetic signal from the benchmark server",
+            "entry_price": round(price, 6),
+            "stop_loss": round(price - sign * risk, 6),
+            "take_profit": round(price + sign * risk * 2, 6),
+            "timeframe_confluence": ["1m", "5m"],
+            "risk_level": "MEDIUM"
+        }
+
+    def reply_text(self, symbols: List[Tuple[str, float]]) -> str:
+        """JSON reply, occasionally malformed (one broken member or a markdown wrapper)"""
+        members = [f"{json.dumps(symbol)}: {json.dumps(self.decision(price))}" for symbol, price in symbols]
+        if members and self.random.random() < self.malformed_rate:
+            i = self.random.randrange(len(members))
+            members[i] = members[i].replace('"confidence": ', '"confidence": ,', 1)
+        text = "{" + ", ".join(members) + "}"
+        if self.random.random() < self.malformed_rate:
+            text = f"```json\n{text}\n```"
+        return text
+
+    def total_latency(self, model: str, symbols: int) -> float:
+        base = self.latency_ms * self.random.lognormvariate(0, self.jitter)
+        return (base + self.per_symbol_ms * symbols) * self.model_latency.get(model, 1.0) / 1000
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        model = body.get("model", "")
+        symbols = self.parse_symbols(prompt)
+        latency = self.total_latency(model, len(symbols))
+
+        if self.random.random() < self.timeout_rate:
+            # Never answers in time; the client's own timeout fires
+            await asyncio.sleep(3600)
+
+        text = self.reply_text(symbols)
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return web.json_response({
+                "id": f"fake-{self.requests}", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)] or [""]
+        delay = latency / len(chunks)
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            event = {"id": f"fake-{self.requests}", "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+            await response.write(f"data: {json.dumps(event)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start in the running loop; returns the base URL (port 0 picks a free port)"""
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/v1"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter", type=float, default=0.3, help="log-normal sigma of the base latency")
+    parser.add_argument("--per-symbol-ms", type=float, default=150)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--signal-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.latency_ms, args.jitter, args.per_symbol_ms, args.malformed_rate,
+                           args.timeout_rate, args.signal_rate)
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+WebSocket frame decoding throughput benchmark
+
+Replays synthetic OKX push frames (books5, tickers, trades) through the
+legacy path (json.loads + dict lookups + f-string keys) and through
+FrameDecoder routing + decoding, and reports messages/second per core.
+
+Usage:
+    python -m benchmarks.ws_decode_benchmark --instruments 200 --subscribed 0.5
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, List
+from data.ws_decoder import FrameDecoder, JSON_BACKEND
+
+def make_frames(instruments: int, count: int) -> List[str]:
+    """Build `count` realistic push frames spread over `instruments` symbols"""
+    frames = []
+    for i in range(count):
+        inst_id = f"COIN{i % instruments}-USDT"
+        kind = i % 3
+        px = 100 + random.random()
+        if kind == 0:
+            levels = [[f"{px - j * 0.01:.2f}", f"{random.random() * 10:.4f}", "0", str(random.randint(1, 9))] for j in range(5)]
+            asks = [[f"{px + j * 0.01:.2f}", f"{random.random() * 10:.4f}", "0", str(random.randint(1, 9))] for j in range(5)]
+            frame = {"arg": {"channel": "books5", "instId": inst_id}, "data": [{"asks": asks, "bids": levels, "instId": inst_id, "ts": "1700000000000", "seqId": i}]}
+        elif kind == 1:
+            frame = {"arg": {"channel": "tickers", "instId": inst_id}, "data": [{"instType": "SPOT", "instId": inst_id, "last": f"{px:.2f}", "lastSz": "0.1", "askPx": f"{px + 0.01:.2f}", "askSz": "1", "bidPx": f"{px - 0.01:.2f}", "bidSz": "1", "open24h": "99", "high24h": "101", "low24h": "98", "vol24h": "12345", "volCcy24h": "1234567", "ts": "1700000000000"}]}
+        else:
+            frame = {"arg": {"channel": "trades", "instId": inst_id}, "data": [{"instId": inst_id, "tradeId": str(i), "px": f"{px:.2f}", "sz": "0.01", "side": "buy", "ts": "1700000000000"}]}
+        frames.append(json.dumps(frame, separators=(",", ":")))
+    return frames
+
+
+def run(label: str, frames: List[str], handler: Callable[[str], None], seconds: float):
+    """Replay frames through handler for roughly `seconds` of CPU time"""
+    processed = 0
+    started = time.process_time()
+    while time.process_time() - started < seconds:
+        for frame in frames:
+            handler(frame)
+        processed += len(frames)
+    elapsed = time.process_time() - started
+    print(f"{label:<28} {processed / elapsed:>12,.0f} msg/s per core")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instruments", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--subscribed", type=float, default=1.0, help="fraction of instruments with a callback")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    frames = make_frames(args.instruments, args.frames)
+    subscribed = {f"COIN{i}-USDT" for i in range(int(args.instruments * args.subscribed))}
+    legacy_callbacks = {f"{ch}:{inst}": [None] for ch in ("books5", "tickers", "trades") for inst in subscribed}
+    routes = {(ch, inst): [None] for ch in ("books5", "tickers", "trades") for inst in subscribed}
+
+    def legacy(raw: str):
+        data = json.loads(raw)
+        if "event" in data:
+            return
+        if "data" in data and "arg" in data:
+            channel = data["arg"]["channel"]
+            inst_id = data["arg"]["instId"]
+            key = f"{channel}:{inst_id}"
+            if key in legacy_callbacks:
+                pass
+            if channel.startswith("candle"):
+                pass
+
+    decoder = FrameDecoder()
+
+    def fast(raw: str):
+        key = decoder.route(raw)
+        if key is None or key not in routes:
+            return
+        decoder.decode(raw)
+
+    print(f"{args.frames} frames, {args.instruments} instruments, {args.subscribed:.0%} subscribed, JSON backend: {JSON_BACKEND}")
+    run("legacy json.loads + f-key", frames, legacy, args.seconds)
+    run("FrameDecoder route + decode", frames, fast, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
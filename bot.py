@@ -1,29 +1,49 @@
 import asyncio
 import signal
 import sys
+import time
 from typing import List
 from config import Config
 from utils.logger import log
+from utils.event_scheduler import EventScheduler
+from utils.http_pool import http_pool
+from data.okx_ws_pool import OKXWebSocketPool
 from data.okx_websocket import OKXWebSocket
+from data.account_state import AccountState
+from data.instrument_registry import instrument_registry
 from data.multi_timeframe_manager import MultiTimeframeManager
-from analysis.indicators import TechnicalIndicators
+from data.candle_cache import CandleCache
+from data.bar_aggregator import BarAggregator
 from analysis.orderbook_analyzer import OrderBookAnalyzer
+from analysis.prescreen import PreScreener
 from ai.decision_engine import DecisionEngine
 from trading.order_executor import OrderExecutor
 
 class ScalpingBot:
     def __init__(self):
         self.running = False
-        self.ws = OKXWebSocket()
-        self.mtf_manager = MultiTimeframeManager()
+        self.ws = OKXWebSocketPool()
+        self.mtf_manager = MultiTimeframeManager(cache=CandleCache() if Config.CANDLE_CACHE_ENABLED else None)
+        # All timeframes are built locally from a single 1m feed
+        self.bar_aggregator = BarAggregator(self.mtf_manager)
+        # Candle channels live on the business endpoint; only needed for the candle1m source
+        self.candle_ws = OKXWebSocketPool(endpoint="business") if Config.BAR_SOURCE == "candle1m" else None
         self.decision_engine = DecisionEngine()
-        self.executor = OrderExecutor()
+        # Account, positions and orders pushed over the authenticated private endpoint
+        self.private_ws = OKXWebSocket(endpoint="private") if Config.PRIVATE_WS_ENABLED and Config.OKX_API_KEY else None
+        self.private_ws_task = None
+        self.account_state = AccountState(stream=self.private_ws)
+        self.executor = OrderExecutor(account_state=self.account_state if self.private_ws else None)
+        # Wakes the analysis loop on events instead of polling
+        self.scheduler = EventScheduler(batch_window=Config.EVENT_BATCH_WINDOW_MS / 1000)
         self.symbols = Config.TRADING_PAIRS
         
         # Track active positions to prevent duplicate trades
         self.active_positions = set()  # Set of symbols with open positions
         self.last_trade_time = {}  # Track when we last traded each symbol
         self.last_ai_analysis = {}  # Track when we last analyzed each symbol with AI
+        self.imbalance_side = {}  # {symbol: -1/0/1}, side of the imbalance trigger threshold
+        self.orderbook_analysis = {}  # {symbol: (book version, analysis)}, recomputed only when the book changed
         self.position_check_interval = 300  # Check positions every 5 minutes
         self.ai_analysis_cooldown = 300  # Only analyze with AI every 5 minutes per symbol
 
@@ -32,48 +52,68 @@ class ScalpingBot:
         self.running = True
         log.info("Starting AI Scalping Bot...")
         
-        # Import REST client
-        from data.okx_rest_client import OKXMarketData
-        rest_client = OKXMarketData()
-        
-        # 1. Fetch initial historical candle data via REST API
+        # 1. Restore cached candles, then fetch the missing history via REST API (concurrently)
+        cached = self.mtf_manager.restore_from_cache(self.symbols)
         log.info("Fetching initial candle data via REST API...")
-        for symbol in self.symbols:
-            for tf in Config.TIMEFRAMES:
-                candles = rest_client.get_candles(symbol, bar=tf, limit=300)
-                if candles:
-                    # Populate the multi-timeframe manager with historical data
-                    for candle_data in candles:
-                        # Convert to OKX WebSocket format
-                        candle_list = [
-                            str(candle_data['timestamp']),
-                            str(candle_data['open']),
-                            str(candle_data['high']),
-                            str(candle_data['low']),
-                            str(candle_data['close']),
-                            str(candle_data['volume']),
-                            "0", "0", "1"  # volCcy, volCcyQuote, confirm
-                        ]
-                        self.mtf_manager.update_candle(symbol, tf, candle_list)
-                    log.info(f"Loaded {len(candles)} historical candles for {symbol} ({tf})")
+        from data.warmup_loader import WarmupLoader
+        history = await WarmupLoader().load(self.symbols, Config.TIMEFRAMES, since=cached)
+        for (symbol, tf), rows in history.items():
+            # One vectorized parse + array copy per series (rows are sorted by the manager)
+            buffered = self.mtf_manager.load_candles(symbol, tf, rows)
+            if rows:
+                log.info(f"Loaded {len(rows)} historical candles for {symbol} ({tf}), {buffered} buffered")
+        
+        # Tick/lot sizes for order sizing and formatting (disk cache, else one bulk REST load)
+        await instrument_registry.load()
         
         # 2. Connect to WebSocket for real-time updates
         await self.ws.connect()
         
-        # 3. Subscribe to real-time channels (order book and ticker only, no candles)
+        # 3. Subscribe to real-time channels (one 1m feed per symbol; higher timeframes are aggregated)
         channels = []
         for symbol in self.symbols:
             # Order book for support/resistance analysis
-            channels.append({"channel": "books5", "instId": symbol})
+            channels.append({"channel": Config.ORDERBOOK_CHANNEL, "instId": symbol})
             
             # Ticker for current price
             channels.append({"channel": "tickers", "instId": symbol})
 
+            if Config.BAR_SOURCE == "trades":
+                channels.append({"channel": "trades", "instId": symbol})
+
         await self.ws.subscribe(channels)
+
+        if self.candle_ws:
+            await self.candle_ws.connect()
+            await self.candle_ws.subscribe([
+                {"channel": f"candle{self.bar_aggregator.source}", "instId": symbol} for symbol in self.symbols
+            ])
         
         # 4. Register callbacks for real-time data
-        self.ws.add_callback("books5", None, self._handle_orderbook)
+        if Config.ORDERBOOK_CHANNEL == "books5":
+            self.ws.add_callback("books5", None, self._handle_orderbook)
+        else:
+            self.ws.add_callback(Config.ORDERBOOK_CHANNEL, None, self._handle_l2_orderbook)
         self.ws.add_callback("tickers", None, self._handle_ticker)
+        if self.candle_ws:
+            self.candle_ws.add_callback(f"candle{self.bar_aggregator.source}", None, self._handle_candle)
+        else:
+            self.ws.add_callback("trades", None, self._handle_trade)
+        self.mtf_manager.add_bar_listener(self._on_bar_confirmed)
+
+        if self.private_ws:
+            self.private_ws.add_callback("account", None, self.account_state.on_account)
+            self.private_ws.add_callback("positions", None, self.account_state.on_positions)
+            self.private_ws.add_callback("orders", None, self.account_state.on_orders)
+            self.account_state.add_fill_listener(self._on_order_filled)
+            self.account_state.add_position_listener(self._on_position_changed)
+            await self.private_ws.subscribe([
+                {"channel": "account", "ccy": "USDT"},
+                {"channel": "positions", "instType": "ANY"},
+                {"channel": "orders", "instType": "ANY"}
+            ])
+            # Connects, logs in and subscribes in the background (retries on its own)
+            self.private_ws_task = asyncio.create_task(self.private_ws.connect())
 
         # 5. Main Loop
         await self._main_loop()
@@ -92,7 +132,10 @@ class ScalpingBot:
             
             if symbol and timeframe and data:
                 for candle in data:
-                    self.mtf_manager.update_candle(symbol, timeframe, candle)
+                    if timeframe == self.bar_aggregator.source:
+                        self.bar_aggregator.on_candle(symbol, candle)
+                    else:
+                        self.mtf_manager.update_candle(symbol, timeframe, candle)
                     
         except Exception as e:
             error_msg = f"Error handling candle: {e}"
@@ -106,6 +149,19 @@ class ScalpingBot:
             except:
                 pass
 
+    async def _handle_trade(self, msg: dict):
+        """Handle trades data (bar source when BAR_SOURCE=trades)"""
+        try:
+            arg = msg.get("arg", {})
+            data = msg.get("data", [])
+            symbol = arg.get("instId")
+            
+            if symbol and data:
+                for trade in data:
+                    self.bar_aggregator.on_trade(symbol, float(trade["px"]), float(trade["sz"]), int(trade["ts"]))
+        except Exception as e:
+            log.error(f"Error handling trade: {e}")
+
     async def _handle_orderbook(self, msg: dict):
         """Handle orderbook data"""
         try:
@@ -115,9 +171,27 @@ class ScalpingBot:
             
             if symbol and data:
                 self.mtf_manager.update_orderbook(symbol, data[0])
+                self._check_imbalance(symbol)
         except Exception as e:
             log.error(f"Error handling orderbook: {e}")
 
+    async def _handle_l2_orderbook(self, msg: dict):
+        """Handle incremental orderbook data (books / books-l2-tbt)"""
+        try:
+            arg = msg.get("arg", {})
+            data = msg.get("data", [])
+            symbol = arg.get("instId")
+            
+            if symbol and data:
+                for book_data in data:
+                    if not self.mtf_manager.update_l2_orderbook(symbol, msg.get("action", "update"), book_data):
+                        # Out of sync (gap or checksum mismatch): get a fresh snapshot
+                        await self.ws.resubscribe([{"channel": arg.get("channel"), "instId": symbol}])
+                        break
+                self._check_imbalance(symbol)
+        except Exception as e:
+            log.error(f"Error handling L2 orderbook: {e}")
+
     async def _handle_ticker(self, msg: dict):
         """Handle ticker data"""
         try:
@@ -131,104 +205,192 @@ class ScalpingBot:
             log.error(f"Error handling ticker: {e}")
 
     async def _main_loop(self):
-        """Main analysis loop"""
-        import time
-        last_position_check = 0
+        """Event-driven analysis loop: runs only on bar closes, book imbalance crossings and cooldown expiries"""
+        self._schedule_bar_flush()
+        self.scheduler.call_later(Config.INSTRUMENT_REFRESH_INTERVAL, "instrument_refresh", self._refresh_instruments)
+        await self._position_check()
         
-        while self.running:
-            try:
-                current_time = time.time()
+        # First pass analyzes every symbol, as the polling loop used to
+        for symbol in self.symbols:
+            self.scheduler.notify(symbol)
+        
+        await self.scheduler.run(self._analyze_symbols)
+
+    def _schedule_bar_flush(self):
+        """Close bars that ended without newer data shortly after each source bar boundary"""
+        step = self.bar_aggregator.source_ms / 1000
+        due = (time.time() // step + 1) * step + self.bar_aggregator.grace_ms / 1000
+        self.scheduler.call_at(due, "bar_flush", self._flush_bars)
+
+    def _flush_bars(self):
+        self.bar_aggregator.flush(int(time.time() * 1000))
+        self._schedule_bar_flush()
+
+    async def _position_check(self):
+        """Periodically check existing positions (every 5 minutes, or a slow reconciliation while positions are pushed)"""
+        await self._update_active_positions()
+        interval = self.position_check_interval
+        if self.private_ws and self.private_ws.running and self.account_state.has_snapshot("positions"):
+            interval = Config.POSITION_RECONCILE_INTERVAL
+        self.scheduler.call_later(interval, "position_check", self._position_check)
+
+    async def _refresh_instruments(self):
+        """Reload instrument metadata (new listings, tick size changes, suspensions)"""
+        await instrument_registry.refresh()
+        self.scheduler.call_later(Config.INSTRUMENT_REFRESH_INTERVAL, "instrument_refresh", self._refresh_instruments)
+
+    async def _on_order_filled(self, order: dict):
+        """A fill closed one of our trades: the symbol can be traded again"""
+        symbol = await self.executor.on_order_filled(order)
+        if symbol:
+            self.active_positions.discard(symbol)
+
+    async def _on_position_changed(self, inst_id: str, position):
+        """Keep active positions in sync with the positions channel"""
+        if position is None:
+            self.active_positions.discard(inst_id)
+        elif inst_id not in self.active_positions:
+            self.active_positions.add(inst_id)
+            log.info(f"Active position found: {inst_id}, Size: {position.get('pos')}")
+
+    def _on_bar_confirmed(self, symbol: str, timeframe: str, ts: int):
+        """A live bar closed: analyze the symbol"""
+        if timeframe == Config.ANALYSIS_TRIGGER_TIMEFRAME:
+            self.scheduler.notify(symbol)
+
+    def _check_imbalance(self, symbol: str):
+        """Analyze a symbol when its book imbalance crosses the trigger threshold"""
+        imbalance = self.mtf_manager.orderbook_store.imbalance(symbol)
+        side = 1 if imbalance >= Config.IMBALANCE_TRIGGER else -1 if imbalance <= -Config.IMBALANCE_TRIGGER else 0
+        if side != self.imbalance_side.get(symbol, 0):
+            self.imbalance_side[symbol] = side
+            if side:
+                self.scheduler.notify(symbol)
+
+    def _defer(self, symbol: str, when: float):
+        """Re-trigger a symbol once its cooldown has expired"""
+        key = ("cooldown", symbol)
+        if not self.scheduler.has_timer(key):
+            self.scheduler.call_at(when, key, lambda: self.scheduler.notify(symbol))
+
+    async def _analyze_symbols(self, triggered: set):
+        """Analyze the triggered symbols together and execute any signals"""
+        try:
+            current_time = time.time()
+            
+            # Collect data for the triggered symbols
+            symbols_data = {}
+            for symbol in self.symbols:
+                if symbol not in triggered:
+                    continue
                 
-                # Periodically check existing positions (every 5 minutes)
-                if current_time - last_position_check > self.position_check_interval:
-                    await self._update_active_positions()
-                    last_position_check = current_time
+                # Skip if already have open position
+                if symbol in self.active_positions:
+                    log.debug(f"Skipping {symbol} - already have open position")
+                    continue
                 
-                # Check AI analysis cooldown - analyze all symbols together
-                should_analyze = False
-                for symbol in self.symbols:
-                    if symbol not in self.last_ai_analysis:
-                        should_analyze = True
-                        break
-                    time_since_last = current_time - self.last_ai_analysis.get(symbol, 0)
-                    if time_since_last >= self.ai_analysis_cooldown:
-                        should_analyze = True
-                        break
+                # Still cooling down from the last AI analysis or trade: retry when it expires
+                last_analysis = self.last_ai_analysis.get(symbol)
+                if last_analysis is not None and current_time - last_analysis < self.ai_analysis_cooldown:
+                    self._defer(symbol, last_analysis + self.ai_analysis_cooldown)
+                    continue
+                last_trade = self.last_trade_time.get(symbol)
+                if last_trade is not None and current_time - last_trade < 300:  # 5 minutes cooldown
+                    self._defer(symbol, last_trade + 300)
+                    continue
                 
-                if should_analyze:
-                    # Collect data for all symbols
-                    symbols_data = {}
-                    for symbol in self.symbols:
-                        # Skip if already have open position
-                        if symbol in self.active_positions:
-                            log.debug(f"Skipping {symbol} - already have open position")
-                            continue
-                        
-                        # Skip if traded recently
-                        if symbol in self.last_trade_time:
-                            time_since_last_trade = current_time - self.last_trade_time[symbol]
-                            if time_since_last_trade < 300:  # 5 minutes cooldown
-                                continue
-                        
-                        # Check if data is ready
-                        if not self.mtf_manager.is_ready(symbol):
-                            continue
-                        
-                        # Get consolidated state
-                        state = self.mtf_manager.get_consolidated_state(symbol)
-                        
-                        # Add indicators
-                        indicators_by_tf = {}
-                        for tf, candles in state['candles'].items():
-                            indicators_by_tf[tf] = TechnicalIndicators.analyze_candles(candles)
-                        state['indicators'] = indicators_by_tf
-                        
-                        # Analyze orderbook
-                        state['market_data']['orderbook_analysis'] = OrderBookAnalyzer.analyze(state['market_data']['orderbook'])
-                        
-                        symbols_data[symbol] = state
-                    
-                    # If we have symbols to analyze, make one AI call for all
-                    if symbols_data:
-                        decisions = await self.decision_engine.evaluate_multiple_markets(symbols_data)
-                        
-                        # Update last analysis time for all symbols
-                        for symbol in symbols_data.keys():
-                            self.last_ai_analysis[symbol] = current_time
-                        
-                        # Execute trades for any signals
-                        if decisions:
-                            for symbol, decision in decisions.items():
-                                if decision:
-                                    log.info(f"AI Signal for {symbol}: {decision}")
-                                    success = await self.executor.execute_signal_async(decision, symbols_data[symbol])
-                                    
-                                    if success:
-                                        self.active_positions.add(symbol)
-                                        self.last_trade_time[symbol] = current_time
-                                        log.info(f"Added {symbol} to active positions")
-
-                await asyncio.sleep(1) # 1 second loop
-
-            except Exception as e:
-                error_msg = f"Error in main loop: {e}"
-                log.error(error_msg)
+                # Check if data is ready
+                if not self.mtf_manager.is_ready(symbol):
+                    continue
                 
-                # Send Telegram notification for critical errors
-                try:
-                    from notifications.telegram_notifier import TelegramNotifier
-                    notifier = TelegramNotifier()
-                    await notifier.notify_error(f"Main loop error: {str(e)}")
-                except:
-                    pass  # Don't let notification errors crash the bot
+                # Get consolidated state
+                state = self.mtf_manager.get_consolidated_state(symbol)
                 
-                await asyncio.sleep(5)
-    
+                # Add indicators (maintained incrementally as candles arrive)
+                state['indicators'] = self.mtf_manager.get_indicators(symbol)
+                
+                symbols_data[symbol] = state
+            
+            if not symbols_data:
+                return
+            
+            # Analyze the books that changed since last time in one vectorized pass
+            self._refresh_orderbook_analysis(list(symbols_data))
+            for symbol, state in symbols_data.items():
+                state['market_data']['orderbook_analysis'] = self.orderbook_analysis[symbol][1]
+            
+            # Local pre-screen: only the most promising symbols are worth an AI call
+            if Config.PRESCREEN_ENABLED:
+                selected, _ = PreScreener.select(symbols_data)
+                symbols_data = {symbol: symbols_data[symbol] for symbol in selected}
+                if not symbols_data:
+                    return
+            
+            # Update last analysis time and wake each symbol again when its cooldown ends
+            for symbol in symbols_data.keys():
+                self.last_ai_analysis[symbol] = current_time
+                self._defer(symbol, current_time + self.ai_analysis_cooldown)
+            
+            # Concurrent AI calls over batches of symbols; execute each batch's signals as it returns,
+            # all sized against one equity snapshot and one committed total for the cycle
+            cycle = {}
+            excluded = set()
+            async for decisions in self.decision_engine.evaluate_markets_concurrently(symbols_data, excluded=excluded):
+                signals = []
+                for symbol, decision in decisions.items():
+                    if decision:
+                        log.info(f"AI Signal for {symbol}: {decision}")
+                        signals.append((decision, symbols_data[symbol]))
+                if not signals:
+                    continue
+                
+                # Submit the batch's orders together
+                results = await self.executor.execute_signals_async(signals, cycle)
+                for symbol, success in results.items():
+                    if success:
+                        self.active_positions.add(symbol)
+                        self.last_trade_time[symbol] = time.time()
+                        log.info(f"Added {symbol} to active positions")
+            
+            # Symbols the prompt token budget left out were never analyzed: release their cooldown and,
+            # if this cycle made progress, retry them right away (else on their next trigger)
+            retry = len(excluded) < len(symbols_data)
+            for symbol in excluded:
+                self.last_ai_analysis.pop(symbol, None)
+                self.scheduler.cancel(("cooldown", symbol))
+                if retry:
+                    self.scheduler.notify(symbol)
+
+        except Exception as e:
+            error_msg = f"Error in main loop: {e}"
+            log.error(error_msg)
+            
+            # Send Telegram notification for critical errors
+            try:
+                from notifications.telegram_notifier import TelegramNotifier
+                notifier = TelegramNotifier()
+                await notifier.notify_error(f"Main loop error: {str(e)}")
+            except:
+                pass  # Don't let notification errors crash the bot
+
+    def _refresh_orderbook_analysis(self, symbols: list):
+        """Re-run the batched orderbook analysis for symbols whose book version moved"""
+        store = self.mtf_manager.orderbook_store
+        stale = [
+            s for s in symbols
+            if s not in self.orderbook_analysis or self.orderbook_analysis[s][0] != store.version(s)
+        ]
+        if not stale:
+            return
+        result = OrderBookAnalyzer.analyze_batch(stale, *self.mtf_manager.get_orderbook_batch(stale))
+        for symbol, analysis in OrderBookAnalyzer.batch_to_dict(result).items():
+            self.orderbook_analysis[symbol] = (store.version(symbol), analysis)
+
     async def _update_active_positions(self):
         """Check OKX for current open positions and update tracking"""
         try:
             log.info("Checking for open positions...")
-            positions = self.executor.client.get_positions(instType=Config.TRADING_MODE)
+            positions = await self.executor.client.get_positions(instType=Config.TRADING_MODE)
             
             # Clear and rebuild active positions set
             self.active_positions.clear()
@@ -250,7 +412,16 @@ class ScalpingBot:
     async def stop(self):
         """Stop the bot"""
         self.running = False
+        self.scheduler.stop()
         await self.ws.close()
+        if self.private_ws_task and not self.private_ws_task.done():
+            # Still connecting or waiting to retry
+            self.private_ws_task.cancel()
+        if self.private_ws:
+            await self.private_ws.close()
+        if self.candle_ws:
+            await self.candle_ws.close()
+        await http_pool.close_all()
         log.info("Bot stopped")
 
 
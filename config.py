@@ -17,11 +17,20 @@ class Config:
     OKX_PASSPHRASE = os.getenv("OKX_PASSPHRASE")
     # Use OKX Demo Trading URL by default for safety
     OKX_DEMO_TRADING = os.getenv("OKX_DEMO_TRADING", "True").lower() == "true"
+    # Total timeout (seconds) of a signed OKX REST request (orders, balance, positions)
+    OKX_REST_TIMEOUT = float(os.getenv("OKX_REST_TIMEOUT", "10"))
+    # Private WebSocket (account, positions, orders); while connected, REST position polling is only a reconciliation
+    PRIVATE_WS_ENABLED = os.getenv("PRIVATE_WS_ENABLED", "True").lower() == "true"
+    POSITION_RECONCILE_INTERVAL = int(os.getenv("POSITION_RECONCILE_INTERVAL", "1800"))
+    # Seconds a pushed account balance is trusted for sizing; older (or disconnected) falls back to REST
+    ACCOUNT_STATE_MAX_AGE = float(os.getenv("ACCOUNT_STATE_MAX_AGE", "60"))
     
     # DeepSeek / AI Configuration
     DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
     # For OpenRouter, use: deepseek/deepseek-chat or deepseek/deepseek-r1
     DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek/deepseek-chat")
+    # OpenAI-compatible endpoint (OpenRouter by default; point at benchmarks/fake_llm_server.py for offline tests)
+    DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://openrouter.ai/api/v1")
     
     # Telegram Notifications
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -33,6 +42,77 @@ class Config:
     # OKX candle channel format: candle1m, candle5m, candle15m, candle30m, candle1H, candle4H, etc.
     TIMEFRAMES = ["1m", "5m", "15m", "1H"]  # Valid OKX timeframes
     
+    # Order book feed: "books5" snapshots, or incremental full depth via "books" / "books-l2-tbt"
+    ORDERBOOK_CHANNEL = os.getenv("ORDERBOOK_CHANNEL", "books5")
+    # Levels per side handed to the order book analyzer from an incremental book
+    ORDERBOOK_DEPTH = int(os.getenv("ORDERBOOK_DEPTH", "50"))
+    
+    # Live bars are aggregated locally from one 1m feed: "candle1m" (business WebSocket) or "trades"
+    BAR_SOURCE = os.getenv("BAR_SOURCE", "candle1m")
+    # Bars of quiet markets are flushed this long after their boundary, so the exchange's final push still lands
+    BAR_FLUSH_GRACE_MS = int(os.getenv("BAR_FLUSH_GRACE_MS", "5000"))
+    
+    # Max queued messages per WebSocket channel before new ones are dropped
+    WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "1000"))
+    # Subscriptions are sharded over several connections (load = weighted channels per connection)
+    WS_SHARD_CAPACITY = int(os.getenv("WS_SHARD_CAPACITY", "300"))
+    WS_MAX_SHARDS = int(os.getenv("WS_MAX_SHARDS", "20"))
+    
+    # Local pre-screen: score every symbol and only send the top K above the minimum score to the AI
+    PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "True").lower() == "true"
+    PRESCREEN_TOP_K = int(os.getenv("PRESCREEN_TOP_K", "5"))
+    PRESCREEN_MIN_SCORE = float(os.getenv("PRESCREEN_MIN_SCORE", "0.35"))
+    
+    # AI fan-out: symbols per AI call and max concurrent calls
+    AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "5"))
+    AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+    
+    # Model routing: wait this long (until a model has its own p95 latency) before hedging with the next model
+    AI_HEDGE_DELAY = float(os.getenv("AI_HEDGE_DELAY", "15"))
+    # Skip a model for AI_BREAKER_COOLDOWN seconds after AI_BREAKER_FAILURES consecutive failures
+    AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", "3"))
+    AI_BREAKER_COOLDOWN = float(os.getenv("AI_BREAKER_COOLDOWN", "60"))
+    
+    # Stream completions and act on each symbol's decision as soon as its JSON object is complete
+    AI_STREAMING = os.getenv("AI_STREAMING", "True").lower() == "true"
+    
+    # Prompt encoding: "compact" (one table row per symbol/timeframe) or "verbose" (text block per symbol)
+    AI_PROMPT_FORMAT = os.getenv("AI_PROMPT_FORMAT", "compact")
+    # Estimated prompt tokens per AI call; symbols beyond it wait for the next cycle
+    AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "6000"))
+    
+    # Reuse AI decisions while a market's quantized regime (RSI/trend/BB/VWAP/imbalance) is unchanged
+    DECISION_CACHE_ENABLED = os.getenv("DECISION_CACHE_ENABLED", "True").lower() == "true"
+    DECISION_CACHE_TTL = float(os.getenv("DECISION_CACHE_TTL", "900"))
+    DECISION_CACHE_SIZE = int(os.getenv("DECISION_CACHE_SIZE", "256"))
+    # Max relative distance between the current price and a cached signal's entry for it to be reused
+    DECISION_CACHE_PRICE_TOLERANCE = float(os.getenv("DECISION_CACHE_PRICE_TOLERANCE", "0.001"))
+    
+    # Event-driven analysis: a symbol is analyzed when a bar of ANALYSIS_TRIGGER_TIMEFRAME closes,
+    # when its top-10 book imbalance crosses +/-IMBALANCE_TRIGGER, or when its cooldown expires
+    ANALYSIS_TRIGGER_TIMEFRAME = os.getenv("ANALYSIS_TRIGGER_TIMEFRAME", "1m")
+    IMBALANCE_TRIGGER = float(os.getenv("IMBALANCE_TRIGGER", "0.5"))
+    # Symbols triggered within this window are analyzed as one batch
+    EVENT_BATCH_WINDOW_MS = int(os.getenv("EVENT_BATCH_WINDOW_MS", "50"))
+    
+    # Shared keep-alive HTTP pools (AI, Telegram, OKX REST)
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+    
+    # Historical warm-up (REST) at startup
+    WARMUP_CANDLES = int(os.getenv("WARMUP_CANDLES", "300"))
+    WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "8"))
+    
+    # On-disk cache of confirmed candles, restored at boot so REST only fills the gap
+    CANDLE_CACHE_ENABLED = os.getenv("CANDLE_CACHE_ENABLED", "True").lower() == "true"
+    CANDLE_CACHE_DIR = os.getenv("CANDLE_CACHE_DIR", "cache/candles")
+    CANDLE_CACHE_MAX_RECORDS = int(os.getenv("CANDLE_CACHE_MAX_RECORDS", "1000"))
+    
+    # Instrument metadata (tick/lot/min size, contract value), cached on disk and refreshed periodically
+    INSTRUMENT_CACHE_PATH = os.getenv("INSTRUMENT_CACHE_PATH", "cache/instruments.json")
+    INSTRUMENT_REFRESH_INTERVAL = int(os.getenv("INSTRUMENT_REFRESH_INTERVAL", "21600"))
+    
     # Trading Mode: SPOT or SWAP (perpetual futures)
     # Start with SPOT to verify instruments exist in demo
     TRADING_MODE = os.getenv("TRADING_MODE", "SPOT")  # SWAP for leverage, SPOT for no leverage
@@ -0,0 +1,133 @@
+import time
+from typing import Callable, Dict, List, Optional, Set
+from config import Config
+from utils.logger import log
+
+class AccountState:
+    """
+    In-memory account state fed by the private WebSocket channels
+
+    - account: total equity and available balance per currency
+    - positions: open positions by instId (closed ones are removed)
+    - orders: live orders by ordId; terminal orders (filled/canceled) are
+      dropped once handled
+    Reads are plain dict lookups, so the executor no longer needs a REST
+    round-trip before each trade. The balance is only trusted while the
+    feeding connection is up and the last account push is younger than
+    max_age; otherwise balance() returns None and callers fall back to REST.
+    Listeners are awaited for every fully filled order and every position change.
+    """
+
+    TERMINAL_STATES = {"filled", "canceled", "mmp_canceled"}
+
+    def __init__(self, stream=None, max_age: float = None):
+        # Connection feeding the state (anything with a `running` flag), checked before trusting it
+        self.stream = stream
+        self.max_age = max_age or Config.ACCOUNT_STATE_MAX_AGE
+        self.equity = 0.0
+        self.balances: Dict[str, float] = {}
+        self.positions: Dict[str, Dict] = {}
+        self.orders: Dict[str, Dict] = {}
+        # channel -> time of the last push (no entry until the first snapshot)
+        self.updated_at: Dict[str, float] = {}
+        self.fill_listeners: List[Callable] = []
+        self.position_listeners: List[Callable] = []
+
+    def add_fill_listener(self, callback: Callable):
+        """callback(order) is awaited when an order is fully filled"""
+        self.fill_listeners.append(callback)
+
+    def add_position_listener(self, callback: Callable):
+        """callback(inst_id, position or None when closed) is awaited on every position change"""
+        self.position_listeners.append(callback)
+
+    def has_snapshot(self, channel: str) -> bool:
+        return channel in self.updated_at
+
+    def is_fresh(self, channel: str) -> bool:
+        """True while the stream is connected and the channel was pushed within max_age"""
+        if self.stream is not None and not self.stream.running:
+            return False
+        updated_at = self.updated_at.get(channel)
+        return updated_at is not None and time.time() - updated_at <= self.max_age
+
+    def balance(self, currency: str = "USDT") -> Optional[float]:
+        """Available balance, or None when there is no fresh account push (disconnected or stale)"""
+        if not self.is_fresh("account"):
+            return None
+        return self.balances.get(currency, 0.0)
+
+    def open_symbols(self) -> Set[str]:
+        return set(self.positions)
+
+    async def on_account(self, msg: Dict):
+        """account channel: equity and per-currency available balance"""
+        for account in msg.get("data", []):
+            try:
+                self.equity = float(account.get("totalEq") or 0)
+                for detail in account.get("details", []):
+                    self.balances[detail.get("ccy")] = float(detail.get("availBal") or 0)
+            except (ValueError, TypeError) as e:
+                log.error(f"Invalid account push: {e}")
+        self.updated_at["account"] = time.time()
+
+    async def on_positions(self, msg: Dict):
+        """positions channel: upsert open positions, remove closed ones"""
+        for position in msg.get("data", []):
+            inst_id = position.get("instId")
+            if not inst_id:
+                continue
+            try:
+                size = float(position.get("pos") or 0)
+            except (ValueError, TypeError):
+                size = 0.0
+
+            if size != 0:
+                self.positions[inst_id] = position
+                current = position
+            elif self.positions.pop(inst_id, None) is not None:
+                log.info(f"Position closed: {inst_id}")
+                current = None
+            else:
+                continue
+
+            for callback in self.position_listeners:
+                try:
+                    await callback(inst_id, current)
+                except Exception as e:
+                    log.error(f"Error in position listener: {e}")
+        self.updated_at["positions"] = time.time()
+
+    async def on_orders(self, msg: Dict):
+        """orders channel: track the order lifecycle and notify fills"""
+        for order in msg.get("data", []):
+            order_id = order.get("ordId")
+            if not order_id:
+                continue
+            state = order.get("state")
+            if state not in self.TERMINAL_STATES:
+                self.orders[order_id] = order
+                continue
+
+            self.orders.pop(order_id, None)
+            if state != "filled":
+                log.info(f"Order {order_id} ({order.get('instId')}) {state}")
+                continue
+
+            log.info(f"Order {order_id} filled: {order.get('side')} {order.get('accFillSz')} {order.get('instId')} @ {order.get('avgPx')}")
+            for callback in self.fill_listeners:
+                try:
+                    await callback(order)
+                except Exception as e:
+                    log.error(f"Error in fill listener: {e}")
+        self.updated_at["orders"] = time.time()
+
+    def stats(self) -> Dict:
+        return {
+            "equity": self.equity,
+            "balances": dict(self.balances),
+            "positions": sorted(self.positions),
+            "live_orders": len(self.orders),
+            "updated_at": dict(self.updated_at),
+            "account_fresh": self.is_fresh("account")
+        }
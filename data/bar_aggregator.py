@@ -0,0 +1,201 @@
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from utils.logger import log
+from data.data_processor import DataProcessor
+
+# OKX aligns 6H and longer bars to Hong Kong time (UTC+8) unless the bar has a "utc" suffix
+HK_OFFSET_MS = 8 * 3_600_000
+HK_ALIGNED_MIN_MS = 6 * 3_600_000
+
+class _BarState:
+    """In-progress higher-timeframe bar: folded finished source bars + the live one"""
+    __slots__ = ("bucket", "open", "high", "low", "volume", "close", "source_ts", "cur_high", "cur_low", "cur_volume", "confirmed", "flushed")
+
+    def __init__(self, bucket: int, open_: float):
+        self.bucket = bucket
+        self.open = open_
+        self.high = float("-inf")
+        self.low = float("inf")
+        self.volume = 0.0
+        self.close = open_
+        self.source_ts = None
+        self.cur_high = float("-inf")
+        self.cur_low = float("inf")
+        self.cur_volume = 0.0
+        self.confirmed = False
+        # Confirmed by flush() before its last source bar was final; that bar may still revise it
+        self.flushed = False
+
+
+class BarAggregator:
+    """
+    Builds every configured timeframe locally from one 1m stream
+
+    Feed it either 1m candles (on_candle, OKX candle1m channel) or raw trades
+    (on_trade, OKX trades channel). Each source bar update is folded into the
+    open bar of every higher timeframe, and the result is written to the
+    MultiTimeframeManager via update_bar. Bars are aligned to OKX boundaries.
+    A higher-timeframe bar is confirmed when its last source bar is confirmed,
+    or when the first source bar of the next bucket arrives. Once confirmed,
+    a bar is only revised by its own last source bar, and only if flush()
+    confirmed it first; late trades for a closed source bar are dropped.
+    flush() waits grace_ms past each boundary for the exchange's final push.
+    """
+
+    def __init__(self, manager, timeframes: List[str] = None, source_timeframe: str = "1m", grace_ms: int = None):
+        self.manager = manager
+        self.grace_ms = Config.BAR_FLUSH_GRACE_MS if grace_ms is None else grace_ms
+        self.source = source_timeframe
+        self.source_ms = DataProcessor.timeframe_to_ms(source_timeframe)
+        self.targets: List[Tuple[str, int]] = []
+        for tf in timeframes or Config.TIMEFRAMES:
+            if tf == source_timeframe:
+                continue
+            tf_ms = DataProcessor.timeframe_to_ms(tf)
+            if tf_ms % self.source_ms != 0:
+                log.warning(f"Cannot aggregate {tf} from {source_timeframe} bars, skipping")
+                continue
+            self.targets.append((tf, tf_ms))
+
+        self.states: Dict[Tuple[str, str], _BarState] = {}
+        # Source bars built from trades: {symbol: [ts, open, high, low, close, volume]}
+        self.trade_bars: Dict[str, List] = {}
+        # Newest source bucket already confirmed per symbol (trades at or before it are late)
+        self.closed_buckets: Dict[str, int] = {}
+        self.late_trades = 0
+
+    @staticmethod
+    def align(ts: int, timeframe: str, tf_ms: Optional[int] = None) -> int:
+        """Start of the OKX bar containing `ts`"""
+        tf_ms = tf_ms or DataProcessor.timeframe_to_ms(timeframe)
+        if tf_ms >= HK_ALIGNED_MIN_MS and not timeframe.endswith("utc"):
+            return (ts + HK_OFFSET_MS) // tf_ms * tf_ms - HK_OFFSET_MS
+        return ts // tf_ms * tf_ms
+
+    def on_candle(self, symbol: str, raw_candle: List[str]):
+        """Process one raw OKX source-timeframe candle ([ts, o, h, l, c, vol, ..., confirm])"""
+        try:
+            ts = int(raw_candle[0])
+            open_ = float(raw_candle[1])
+            high = float(raw_candle[2])
+            low = float(raw_candle[3])
+            close = float(raw_candle[4])
+            volume = float(raw_candle[5])
+            confirmed = raw_candle[8] == "1"
+        except (IndexError, ValueError, TypeError) as e:
+            log.error(f"Error parsing candle for {symbol}: {e}")
+            return
+        self._on_source_bar(symbol, ts, open_, high, low, close, volume, confirmed)
+
+    def on_trade(self, symbol: str, price: float, size: float, ts: int):
+        """Fold one trade into the current source bar"""
+        bucket = ts // self.source_ms * self.source_ms
+        closed = self.closed_buckets.get(symbol)
+        if closed is not None and bucket <= closed:
+            # Late trade for a bar that is already confirmed (possibly flushed)
+            self.late_trades += 1
+            return
+
+        bar = self.trade_bars.get(symbol)
+        if bar is not None and bucket > bar[0]:
+            # First trade of a new bar closes the previous one
+            self._on_source_bar(symbol, *bar, True)
+            self.closed_buckets[symbol] = bar[0]
+            bar = None
+
+        if bar is None:
+            bar = [bucket, price, price, price, price, size]
+            self.trade_bars[symbol] = bar
+        else:
+            bar[2] = max(bar[2], price)
+            bar[3] = min(bar[3], price)
+            bar[4] = price
+            bar[5] += size
+
+        self._on_source_bar(symbol, *bar, False)
+
+    def flush(self, now_ms: int):
+        """Confirm bars whose interval (plus the grace period) has ended without newer data (quiet markets)"""
+        now_ms -= self.grace_ms
+        for symbol, bar in list(self.trade_bars.items()):
+            if bar[0] + self.source_ms <= now_ms:
+                self._on_source_bar(symbol, *bar, True)
+                self.closed_buckets[symbol] = bar[0]
+                del self.trade_bars[symbol]
+
+        for (symbol, tf), state in self.states.items():
+            if not state.confirmed and state.bucket + DataProcessor.timeframe_to_ms(tf) <= now_ms:
+                state.confirmed = True
+                state.flushed = True
+                self._emit(symbol, tf, state)
+
+    def _on_source_bar(self, symbol: str, ts: int, open_: float, high: float, low: float, close: float, volume: float, confirmed: bool):
+        """Write the source bar and fold it into every higher timeframe"""
+        self.manager.update_bar(symbol, self.source, ts, open_, high, low, close, volume, confirmed)
+
+        for tf, tf_ms in self.targets:
+            key = (symbol, tf)
+            bucket = self.align(ts, tf, tf_ms)
+            state = self.states.get(key)
+
+            last = ts + self.source_ms == bucket + tf_ms
+            if state is not None and (bucket < state.bucket or (bucket == state.bucket and state.confirmed and not (state.flushed and last))):
+                continue  # Revision of a bar that is already closed and emitted as confirmed
+
+            if state is None or bucket > state.bucket:
+                if state is not None and not state.confirmed:
+                    # The previous bucket ended without a confirmed last source bar
+                    state.confirmed = True
+                    self._emit(symbol, tf, state)
+                state = self._start_bucket(symbol, bucket, ts, open_)
+                self.states[key] = state
+
+            if state.source_ts != ts:
+                # A new source bar: the previous one is final, fold it into the base
+                if state.source_ts is not None:
+                    state.high = max(state.high, state.cur_high)
+                    state.low = min(state.low, state.cur_low)
+                    state.volume += state.cur_volume
+                state.source_ts = ts
+
+            state.cur_high = high
+            state.cur_low = low
+            state.cur_volume = volume
+            state.close = close
+            # A flushed bar stays confirmed; its final source bar makes it final for good
+            state.confirmed = state.confirmed or (confirmed and last)
+            if confirmed and last:
+                state.flushed = False
+            self._emit(symbol, tf, state)
+
+    def _start_bucket(self, symbol: str, bucket: int, ts: int, open_: float) -> _BarState:
+        """
+        Open a new higher-timeframe bar
+        Source bars of the same bucket already buffered (e.g. from warm-up,
+        when joining mid-bar) are folded in so open/high/low/volume are complete.
+        """
+        state = _BarState(bucket, open_)
+        source = self.manager.data.get(symbol, {}).get(self.source)
+        if source is not None and len(source) > 0:
+            ts_col = source.ts
+            mask = (ts_col >= bucket) & (ts_col < ts)
+            if mask.any():
+                state.open = float(source.open[mask][0])
+                state.high = float(source.high[mask].max())
+                state.low = float(source.low[mask].min())
+                state.volume = float(source.volume[mask].sum())
+        return state
+
+    def _emit(self, symbol: str, tf: str, state: _BarState):
+        """Write the aggregated bar to the manager"""
+        self.manager.update_bar(
+            symbol,
+            tf,
+            state.bucket,
+            state.open,
+            max(state.high, state.cur_high),
+            min(state.low, state.cur_low),
+            state.close,
+            state.volume + state.cur_volume,
+            state.confirmed
+        )
@@ -0,0 +1,136 @@
+import numpy as np
+from typing import Dict, Optional
+
+class CandleBuffer:
+    """
+    Preallocated columnar ring buffer for one (symbol, timeframe) series
+
+    Every column is stored twice back to back (slot i and slot i + capacity),
+    so the live window is always one contiguous slice of the backing array.
+    Column properties return zero-copy, read-only numpy views ordered oldest
+    to newest. A view is only valid until the next write to the buffer.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self._ts = np.zeros(capacity * 2, dtype=np.int64)
+        self._open = np.zeros(capacity * 2, dtype=np.float64)
+        self._high = np.zeros(capacity * 2, dtype=np.float64)
+        self._low = np.zeros(capacity * 2, dtype=np.float64)
+        self._close = np.zeros(capacity * 2, dtype=np.float64)
+        self._volume = np.zeros(capacity * 2, dtype=np.float64)
+        self._confirmed = np.zeros(capacity * 2, dtype=np.bool_)
+        self._start = 0  # Physical index of the oldest candle
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """Timestamp of the newest candle, or None when empty"""
+        if self._size == 0:
+            return None
+        return int(self._ts[self._start + self._size - 1])
+
+    def append(self, ts: int, open_: float, high: float, low: float, close: float, volume: float, confirmed: bool):
+        """Append a new candle, evicting the oldest one when full"""
+        if self._size < self.capacity:
+            slot = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._write(slot, ts, open_, high, low, close, volume, confirmed)
+
+    def replace_last(self, ts: int, open_: float, high: float, low: float, close: float, volume: float, confirmed: bool):
+        """Overwrite the newest candle in place (still-open bar revision)"""
+        if self._size == 0:
+            self.append(ts, open_, high, low, close, volume, confirmed)
+            return
+        slot = (self._start + self._size - 1) % self.capacity
+        self._write(slot, ts, open_, high, low, close, volume, confirmed)
+
+    def upsert(self, ts: int, open_: float, high: float, low: float, close: float, volume: float, confirmed: bool) -> bool:
+        """
+        Replace the newest candle if it has the same timestamp, else append
+        Returns True when the newest candle was replaced
+        """
+        if self._size > 0 and self.last_timestamp == ts:
+            self.replace_last(ts, open_, high, low, close, volume, confirmed)
+            return True
+        self.append(ts, open_, high, low, close, volume, confirmed)
+        return False
+
+    def load(self, ts: np.ndarray, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, confirmed: np.ndarray):
+        """Replace the contents with the given columns (oldest first); keeps the newest `capacity` rows"""
+        n = min(len(ts), self.capacity)
+        columns = (
+            (self._ts, ts), (self._open, open_), (self._high, high), (self._low, low),
+            (self._close, close), (self._volume, volume), (self._confirmed, confirmed)
+        )
+        for dest, src in columns:
+            dest[:n] = src[len(src) - n:]
+            dest[self.capacity:self.capacity + n] = dest[:n]
+        self._start = 0
+        self._size = n
+
+    def _write(self, slot: int, ts: int, open_: float, high: float, low: float, close: float, volume: float, confirmed: bool):
+        """Write one candle into a slot and its mirror"""
+        for i in (slot, slot + self.capacity):
+            self._ts[i] = ts
+            self._open[i] = open_
+            self._high[i] = high
+            self._low[i] = low
+            self._close[i] = close
+            self._volume[i] = volume
+            self._confirmed[i] = confirmed
+
+    def _view(self, column: np.ndarray) -> np.ndarray:
+        """Contiguous read-only view of the live window of a column"""
+        view = column[self._start:self._start + self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self._view(self._ts)
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._view(self._open)
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._view(self._high)
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._view(self._low)
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._view(self._close)
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._view(self._volume)
+
+    @property
+    def confirmed(self) -> np.ndarray:
+        return self._view(self._confirmed)
+
+    def last(self) -> Dict:
+        """Newest candle as a dict (for logging and notifications)"""
+        if self._size == 0:
+            return {}
+        i = self._start + self._size - 1
+        return {
+            "timestamp": int(self._ts[i]),
+            "open": float(self._open[i]),
+            "high": float(self._high[i]),
+            "low": float(self._low[i]),
+            "close": float(self._close[i]),
+            "volume": float(self._volume[i]),
+            "confirmed": bool(self._confirmed[i])
+        }
@@ -0,0 +1,140 @@
+import os
+import numpy as np
+from typing import Dict, Optional, Tuple
+from config import Config
+from utils.logger import log
+
+# One fixed-size little-endian record per confirmed candle
+CANDLE_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+class CandleCache:
+    """
+    Append-only binary cache of confirmed candles, one file per (symbol, timeframe)
+
+    Files are raw CANDLE_DTYPE records in timestamp order and are read back
+    through np.memmap, so restoring a series only touches its tail. When a
+    file grows past twice `max_records` it is compacted to the newest
+    `max_records` entries.
+    """
+
+    def __init__(self, directory: str = None, max_records: int = None):
+        self.directory = directory or Config.CANDLE_CACHE_DIR
+        self.max_records = max_records or Config.CANDLE_CACHE_MAX_RECORDS
+        os.makedirs(self.directory, exist_ok=True)
+        # Newest cached timestamp per series, to keep files ordered and duplicate free
+        self.last_ts: Dict[Tuple[str, str], int] = {}
+
+    def _path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.directory, f"{symbol}_{timeframe}.bin")
+
+    def load(self, symbol: str, timeframe: str, count: int) -> np.ndarray:
+        """Return the newest `count` cached candles (oldest first) as a structured array"""
+        path = self._path(symbol, timeframe)
+        try:
+            if not os.path.exists(path):
+                return np.empty(0, dtype=CANDLE_DTYPE)
+
+            total = self._repair(path)
+            if total == 0:
+                return np.empty(0, dtype=CANDLE_DTYPE)
+
+            records = np.memmap(path, dtype=CANDLE_DTYPE, mode="r", shape=(total,))
+            tail = np.array(records[-count:])
+            del records
+
+            self.last_ts[(symbol, timeframe)] = int(tail["ts"][-1])
+            return tail
+
+        except Exception as e:
+            log.error(f"Error loading candle cache for {symbol} ({timeframe}): {e}")
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Newest cached timestamp for a series, if known"""
+        return self.last_ts.get((symbol, timeframe))
+
+    def append(self, symbol: str, timeframe: str, ts: int, open_: float, high: float, low: float, close: float, volume: float):
+        """Append one confirmed candle; a revision of the newest one is rewritten in place, older timestamps are ignored"""
+        key = (symbol, timeframe)
+        if key not in self.last_ts:
+            self._read_last_ts(symbol, timeframe)
+        last_ts = self.last_ts.get(key, -1)
+        if ts < last_ts:
+            return
+
+        try:
+            record = np.array([(ts, open_, high, low, close, volume)], dtype=CANDLE_DTYPE)
+            path = self._path(symbol, timeframe)
+            if ts == last_ts:
+                with open(path, "r+b") as f:
+                    f.seek(-CANDLE_DTYPE.itemsize, os.SEEK_END)
+                    f.write(record.tobytes())
+                return
+            with open(path, "ab") as f:
+                f.write(record.tobytes())
+            self.last_ts[key] = ts
+
+            if os.path.getsize(path) > 2 * self.max_records * CANDLE_DTYPE.itemsize:
+                self._compact(symbol, timeframe)
+
+        except Exception as e:
+            log.error(f"Error writing candle cache for {symbol} ({timeframe}): {e}")
+
+    def extend(self, symbol: str, timeframe: str, records: np.ndarray):
+        """Append a block of CANDLE_DTYPE records (oldest first) in one write; skips ones already cached"""
+        key = (symbol, timeframe)
+        if key not in self.last_ts:
+            self._read_last_ts(symbol, timeframe)
+        records = records[records["ts"] > self.last_ts.get(key, -1)]
+        if len(records) == 0:
+            return
+
+        try:
+            path = self._path(symbol, timeframe)
+            with open(path, "ab") as f:
+                f.write(records.astype(CANDLE_DTYPE, copy=False).tobytes())
+            self.last_ts[key] = int(records["ts"][-1])
+
+            if os.path.getsize(path) > 2 * self.max_records * CANDLE_DTYPE.itemsize:
+                self._compact(symbol, timeframe)
+
+        except Exception as e:
+            log.error(f"Error writing candle cache for {symbol} ({timeframe}): {e}")
+
+    def _read_last_ts(self, symbol: str, timeframe: str):
+        """Read the newest timestamp from disk without loading the file"""
+        path = self._path(symbol, timeframe)
+        if not os.path.exists(path):
+            return
+        total = self._repair(path)
+        if total == 0:
+            return
+        records = np.memmap(path, dtype=CANDLE_DTYPE, mode="r", shape=(total,))
+        self.last_ts[(symbol, timeframe)] = int(records["ts"][-1])
+        del records
+
+    def _repair(self, path: str) -> int:
+        """Drop a partially written trailing record (e.g. crash mid-append); returns record count"""
+        size = os.path.getsize(path)
+        total = size // CANDLE_DTYPE.itemsize
+        if size % CANDLE_DTYPE.itemsize:
+            with open(path, "r+b") as f:
+                f.truncate(total * CANDLE_DTYPE.itemsize)
+            log.warning(f"Truncated partial record in candle cache {path}")
+        return total
+
+    def _compact(self, symbol: str, timeframe: str):
+        """Rewrite a series file keeping only the newest max_records entries"""
+        path = self._path(symbol, timeframe)
+        tail = self.load(symbol, timeframe, self.max_records)
+        tmp_path = path + ".tmp"
+        tail.tofile(tmp_path)
+        os.replace(tmp_path, path)
+        log.debug(f"Compacted candle cache for {symbol} ({timeframe}) to {len(tail)} records")
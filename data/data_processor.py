@@ -3,6 +3,18 @@ from datetime import datetime
 from utils.logger import log
 
 class DataProcessor:
+    # Bar duration in milliseconds per OKX bar unit suffix
+    _BAR_UNIT_MS = {"s": 1000, "m": 60_000, "H": 3_600_000, "D": 86_400_000, "W": 604_800_000}
+
+    @staticmethod
+    def timeframe_to_ms(timeframe: str) -> int:
+        """Convert an OKX bar string (1m, 5m, 1H, 1D, 1Dutc...) to milliseconds"""
+        bar = timeframe.replace("utc", "")
+        unit = bar[-1]
+        if unit not in DataProcessor._BAR_UNIT_MS or not bar[:-1].isdigit():
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        return int(bar[:-1]) * DataProcessor._BAR_UNIT_MS[unit]
+
     @staticmethod
     def normalize_candle(data: List[str]) -> Dict:
         """
@@ -0,0 +1,179 @@
+import json
+import math
+import os
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional
+import aiohttp
+from config import Config
+from utils.logger import log
+from utils.http_pool import http_pool
+
+class InstrumentSpec:
+    """
+    Trading rules of one instrument, with rounding helpers
+
+    Order sizes are in base currency for SPOT and in contracts for SWAP
+    (ctVal base units per contract, linear USDT swaps). Sizes round down to
+    lotSz so a position never exceeds its risk budget; prices round to tickSz.
+    """
+
+    __slots__ = ("inst_id", "inst_type", "tick_sz", "lot_sz", "min_sz", "ct_val", "state",
+                 "price_decimals", "size_decimals")
+
+    # Absorbs float error before flooring/ceiling, e.g. 0.03 / 0.01 = 2.9999999999999996
+    EPSILON = 1e-9
+
+    def __init__(self, row: Dict):
+        self.inst_id = row["instId"]
+        self.inst_type = row.get("instType", "SPOT")
+        self.tick_sz = float(row["tickSz"])
+        self.lot_sz = float(row["lotSz"])
+        self.min_sz = float(row.get("minSz") or row["lotSz"])
+        self.ct_val = float(row.get("ctVal") or 1) if self.inst_type == "SWAP" else 1.0
+        self.state = row.get("state", "live")
+        self.price_decimals = self._decimals(row["tickSz"])
+        self.size_decimals = self._decimals(row["lotSz"])
+
+    @staticmethod
+    def _decimals(step: str) -> int:
+        return max(0, -Decimal(str(step)).normalize().as_tuple().exponent)
+
+    @property
+    def is_live(self) -> bool:
+        return self.state == "live"
+
+    def round_price(self, price: float, mode: str = "nearest") -> float:
+        """Price on the tick grid; mode is 'nearest', 'down' or 'up'"""
+        steps = price / self.tick_sz
+        if mode == "down":
+            steps = math.floor(steps + self.EPSILON)
+        elif mode == "up":
+            steps = math.ceil(steps - self.EPSILON)
+        else:
+            steps = round(steps)
+        return round(steps * self.tick_sz, self.price_decimals)
+
+    def format_price(self, price: float, mode: str = "nearest") -> str:
+        return f"{self.round_price(price, mode):.{self.price_decimals}f}"
+
+    def order_size(self, quantity: float) -> float:
+        """Base-currency quantity -> order size (contracts for SWAP), floored to lotSz; 0 below minSz"""
+        size = quantity / self.ct_val
+        size = round(math.floor(size / self.lot_sz + self.EPSILON) * self.lot_sz, self.size_decimals)
+        return size if size >= self.min_sz else 0.0
+
+    def format_size(self, size: float) -> str:
+        return f"{size:.{self.size_decimals}f}"
+
+    def base_quantity(self, size: float) -> float:
+        """Order size -> base-currency quantity"""
+        return size * self.ct_val
+
+
+class InstrumentRegistry:
+    """
+    Instrument metadata (tickSz, lotSz, minSz, ctVal, state) for every SPOT
+    and SWAP instrument, bulk-loaded from /public/instruments
+
+    The raw rows are cached on disk and reused while younger than
+    INSTRUMENT_REFRESH_INTERVAL, so a restart does not refetch them;
+    refresh() reloads from the exchange. Lookups are dict reads.
+    """
+
+    BASE_URL = "https://www.okx.com/api/v5"
+    INST_TYPES = ("SPOT", "SWAP")
+
+    def __init__(self, path: str = None, max_age: float = None):
+        self.path = path or Config.INSTRUMENT_CACHE_PATH
+        self.max_age = max_age or Config.INSTRUMENT_REFRESH_INTERVAL
+        self.instruments: Dict[str, InstrumentSpec] = {}
+        self.loaded_at = 0.0
+
+    def get(self, inst_id: str) -> Optional[InstrumentSpec]:
+        return self.instruments.get(inst_id)
+
+    async def load(self) -> int:
+        """Load from the disk cache when fresh, else from the exchange; returns the instrument count"""
+        if self._load_cache(self.max_age):
+            return len(self.instruments)
+        return await self.refresh()
+
+    async def refresh(self) -> int:
+        """Fetch every instrument type from the exchange and update the disk cache"""
+        rows: List[Dict] = []
+        for inst_type in self.INST_TYPES:
+            fetched = await self._fetch(inst_type)
+            if not fetched:
+                # Keep the previous set rather than a partial one
+                rows = []
+                break
+            rows.extend(fetched)
+
+        if rows:
+            self._set(rows, time.time())
+            self._save_cache(rows)
+            log.info(f"Loaded {len(self.instruments)} instruments from OKX")
+        elif not self.instruments and self._load_cache(None):
+            log.warning("Instrument refresh failed, using the stale disk cache")
+        return len(self.instruments)
+
+    async def _fetch(self, inst_type: str) -> List[Dict]:
+        try:
+            url = f"{self.BASE_URL}/public/instruments"
+            async with http_pool.session(url).get(url, params={"instType": inst_type},
+                                                  timeout=aiohttp.ClientTimeout(total=15)) as response:
+                data = await response.json(content_type=None)
+            if data.get("code") != "0":
+                log.error(f"OKX API error fetching {inst_type} instruments: {data.get('msg')}")
+                return []
+            return data.get("data", [])
+        except Exception as e:
+            log.error(f"Error fetching {inst_type} instruments: {e}")
+            return []
+
+    def _set(self, rows: List[Dict], loaded_at: float):
+        instruments = {}
+        for row in rows:
+            try:
+                spec = InstrumentSpec(row)
+                instruments[spec.inst_id] = spec
+            except (KeyError, ValueError, ArithmeticError) as e:
+                log.debug(f"Skipping instrument {row.get('instId')}: {e}")
+        self.instruments = instruments
+        self.loaded_at = loaded_at
+
+    def _load_cache(self, max_age: Optional[float]) -> bool:
+        """Use the disk cache if it exists (and is younger than max_age, unless None)"""
+        try:
+            if not os.path.exists(self.path):
+                return False
+            with open(self.path) as f:
+                cached = json.load(f)
+            fetched_at = cached.get("fetched_at", 0)
+            if max_age is not None and time.time() - fetched_at > max_age:
+                return False
+            self._set(cached.get("instruments", []), fetched_at)
+            log.info(f"Loaded {len(self.instruments)} instruments from {self.path}")
+            return bool(self.instruments)
+        except Exception as e:
+            log.error(f"Error reading instrument cache: {e}")
+            return False
+
+    def _save_cache(self, rows: List[Dict]):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fields = ("instId", "instType", "tickSz", "lotSz", "minSz", "ctVal", "state")
+            slim = [{k: row.get(k) for k in fields} for row in rows]
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"fetched_at": self.loaded_at, "instruments": slim}, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log.error(f"Error writing instrument cache: {e}")
+
+
+# Shared by the position sizer and the order executor
+instrument_registry = InstrumentRegistry()
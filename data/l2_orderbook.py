@@ -0,0 +1,166 @@
+import time
+import zlib
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from utils.logger import log
+
+class _BookSide:
+    """
+    One side of the book as price-sorted, best-first level arrays
+
+    `levels` is an (capacity, 2) [price, size] array kept sorted best-first;
+    `keys` holds price * sign (ascending for both sides) for searchsorted.
+    The original price/size strings are kept alongside for the OKX checksum.
+    """
+
+    def __init__(self, sign: int, capacity: int = 400):
+        self.sign = sign  # +1 asks (ascending prices), -1 bids (descending prices)
+        self.levels = np.zeros((capacity, 2), dtype=np.float64)
+        self.keys = np.zeros(capacity, dtype=np.float64)
+        self.raw: List[Tuple[str, str]] = []
+        self.size = 0
+
+    def clear(self):
+        self.size = 0
+        self.raw = []
+
+    def _grow(self):
+        capacity = len(self.keys) * 2
+        levels = np.zeros((capacity, 2), dtype=np.float64)
+        keys = np.zeros(capacity, dtype=np.float64)
+        levels[:self.size] = self.levels[:self.size]
+        keys[:self.size] = self.keys[:self.size]
+        self.levels = levels
+        self.keys = keys
+
+    def apply(self, updates: List[List[str]]):
+        """Apply [price, size, ...] deltas in place; size "0" removes the level"""
+        for level in updates:
+            px_str, sz_str = level[0], level[1]
+            price = float(px_str)
+            key = price * self.sign
+            n = self.size
+            i = int(np.searchsorted(self.keys[:n], key))
+            exists = i < n and self.keys[i] == key
+
+            if float(sz_str) == 0:
+                if exists:
+                    self.levels[i:n - 1] = self.levels[i + 1:n]
+                    self.keys[i:n - 1] = self.keys[i + 1:n]
+                    del self.raw[i]
+                    self.size -= 1
+            elif exists:
+                self.levels[i, 1] = float(sz_str)
+                self.raw[i] = (px_str, sz_str)
+            else:
+                if n == len(self.keys):
+                    self._grow()
+                self.levels[i + 1:n + 1] = self.levels[i:n]
+                self.keys[i + 1:n + 1] = self.keys[i:n]
+                self.levels[i, 0] = price
+                self.levels[i, 1] = float(sz_str)
+                self.keys[i] = key
+                self.raw.insert(i, (px_str, sz_str))
+                self.size += 1
+
+    def top(self, n: int) -> np.ndarray:
+        """Zero-copy (n, 2) view of the best n levels"""
+        return self.levels[:min(n, self.size)]
+
+
+class L2OrderBook:
+    """
+    Local full-depth order book maintained from OKX incremental channels
+    (books, books-l2-tbt, books50-l2-tbt)
+
+    A snapshot seeds the book and every update is applied in place. Each
+    message is checked for sequence gaps (prevSeqId) and against the OKX
+    CRC32 checksum of the top 25 levels. apply() returns False when the book
+    has just gone out of sync, or receives an update without ever having had
+    a snapshot (e.g. it was dropped); the caller must resubscribe to get a
+    fresh snapshot. Updates received before that snapshot are ignored, unless
+    it has not arrived within RESYNC_TIMEOUT, in which case it is requested again.
+    """
+
+    CHECKSUM_DEPTH = 25
+    # Seconds to wait for the snapshot of a requested resync before asking again
+    RESYNC_TIMEOUT = 10.0
+
+    def __init__(self, inst_id: str):
+        self.inst_id = inst_id
+        self.bids = _BookSide(-1)
+        self.asks = _BookSide(1)
+        self.seq_id: Optional[int] = None
+        self.timestamp = 0
+        self.synced = False
+        # Monotonic time of the last resync request (None: no request pending)
+        self.resync_requested_at: Optional[float] = None
+
+    def _request_resync(self) -> bool:
+        self.synced = False
+        self.resync_requested_at = time.monotonic()
+        return False
+
+    def apply(self, action: str, data: Dict) -> bool:
+        """Apply a snapshot or update message; returns False if the book must be resynced"""
+        try:
+            if action == "snapshot":
+                self.bids.clear()
+                self.asks.clear()
+            elif not self.synced:
+                if self.resync_requested_at is not None and time.monotonic() - self.resync_requested_at < self.RESYNC_TIMEOUT:
+                    return True  # Resync already requested; ignore updates until the snapshot arrives
+                log.warning(f"{self.inst_id}: order book update without a snapshot, resyncing")
+                return self._request_resync()
+            else:
+                prev_seq = data.get("prevSeqId")
+                if prev_seq is not None and self.seq_id is not None and int(prev_seq) != self.seq_id:
+                    log.warning(f"{self.inst_id}: order book sequence gap ({prev_seq} != {self.seq_id})")
+                    return self._request_resync()
+
+            self.bids.apply(data.get("bids", []))
+            self.asks.apply(data.get("asks", []))
+
+            if "seqId" in data:
+                self.seq_id = int(data["seqId"])
+            self.timestamp = int(data.get("ts", 0))
+
+            checksum = data.get("checksum")
+            if checksum is not None and int(checksum) != self.checksum():
+                log.warning(f"{self.inst_id}: order book checksum mismatch, resyncing")
+                return self._request_resync()
+
+            self.synced = True
+            self.resync_requested_at = None
+            return True
+
+        except Exception as e:
+            log.error(f"Error applying order book update for {self.inst_id}: {e}")
+            return self._request_resync()
+
+    def checksum(self) -> int:
+        """OKX checksum: signed CRC32 of interleaved bid/ask 'price:size' for the top 25 levels"""
+        parts = []
+        bids = self.bids.raw
+        asks = self.asks.raw
+        for i in range(self.CHECKSUM_DEPTH):
+            if i < len(bids):
+                parts.append(f"{bids[i][0]}:{bids[i][1]}")
+            if i < len(asks):
+                parts.append(f"{asks[i][0]}:{asks[i][1]}")
+        crc = zlib.crc32(":".join(parts).encode())
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+    def top(self, depth: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Best `depth` bid and ask levels as zero-copy (n, 2) [price, size] views"""
+        return self.bids.top(depth), self.asks.top(depth)
+
+    def as_dict(self, depth: int) -> Dict:
+        """Top-of-book view in the normalized orderbook format used by OrderBookAnalyzer"""
+        bids, asks = self.top(depth)
+        return {
+            "instId": self.inst_id,
+            "bids": bids,
+            "asks": asks,
+            "timestamp": self.timestamp
+        }
@@ -1,27 +1,45 @@
-from typing import Dict, List, Optional
-from collections import deque
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
 from config import Config
 from utils.logger import log
 from data.data_processor import DataProcessor
+from data.candle_buffer import CandleBuffer
+from data.candle_cache import CandleCache, CANDLE_DTYPE
+from data.l2_orderbook import L2OrderBook
+from data.orderbook_store import OrderBookStore
+from analysis.streaming_indicators import StreamingIndicators
 
 class MultiTimeframeManager:
-    def __init__(self):
+    def __init__(self, cache: Optional[CandleCache] = None):
         self.timeframes = Config.TIMEFRAMES
-        # Storage for candles: {symbol: {timeframe: deque(maxlen=100)}}
-        self.data: Dict[str, Dict[str, deque]] = {}
-        # Storage for latest orderbook: {symbol: data}
-        self.orderbooks: Dict[str, Dict] = {}
+        # Optional on-disk cache; confirmed candles are appended as they are written
+        self.cache = cache
+        # Storage for candles: {symbol: {timeframe: CandleBuffer(capacity=100)}}
+        self.data: Dict[str, Dict[str, CandleBuffer]] = {}
+        # Incremental indicator state fed by update_candle: {symbol: {timeframe: StreamingIndicators}}
+        self.indicators: Dict[str, Dict[str, StreamingIndicators]] = {}
+        # Latest order book per symbol, overwritten in place (books5 pushes and the top of L2 books)
+        self.orderbook_store = OrderBookStore(levels=Config.ORDERBOOK_DEPTH)
+        # Full-depth incremental books (books / books-l2-tbt channels): {symbol: L2OrderBook}
+        self.l2_books: Dict[str, L2OrderBook] = {}
         # Storage for latest ticker: {symbol: data}
         self.tickers: Dict[str, Dict] = {}
         
         self.window_size = 100
+        # Called with (symbol, timeframe, ts) whenever a live candle is written as confirmed
+        self.bar_listeners: List[Callable[[str, str, int], None]] = []
 
     def initialize_symbol(self, symbol: str):
         """Initialize storage for a symbol"""
         if symbol not in self.data:
-            self.data[symbol] = {tf: deque(maxlen=self.window_size) for tf in self.timeframes}
+            self.data[symbol] = {tf: CandleBuffer(self.window_size) for tf in self.timeframes}
+            self.indicators[symbol] = {tf: StreamingIndicators() for tf in self.timeframes}
             log.info(f"Initialized data storage for {symbol}")
 
+    def add_bar_listener(self, callback: Callable[[str, str, int], None]):
+        """Register a callback for confirmed (closed) live bars"""
+        self.bar_listeners.append(callback)
+
     def update_candle(self, symbol: str, timeframe: str, raw_candle: List[str]):
         """Update candle data"""
         if symbol not in self.data:
@@ -31,16 +49,152 @@ class MultiTimeframeManager:
         if not candle:
             return
 
-        dq = self.data[symbol][timeframe]
-        
-        if len(dq) > 0 and dq[-1]['timestamp'] == candle['timestamp']:
-            dq[-1] = candle
+        self._write_candle(
+            symbol,
+            timeframe,
+            candle['timestamp'],
+            candle['open'],
+            candle['high'],
+            candle['low'],
+            candle['close'],
+            candle['volume'],
+            candle['confirmed']
+        )
+
+    def update_bar(self, symbol: str, timeframe: str, ts: int, open_: float, high: float, low: float, close: float, volume: float, confirmed: bool):
+        """Update candle data from already parsed values (used by the bar aggregator)"""
+        if symbol not in self.data:
+            self.initialize_symbol(symbol)
+        if timeframe not in self.data[symbol]:
+            return
+        self._write_candle(symbol, timeframe, ts, open_, high, low, close, volume, confirmed)
+
+    def _write_candle(self, symbol: str, timeframe: str, ts: int, open_: float, high: float, low: float, close: float, volume: float, confirmed: bool):
+        """Write one candle to the buffer and fold it into the streaming indicators"""
+        buffer = self.data[symbol][timeframe]
+        engine = self.indicators[symbol][timeframe]
+
+        # The engine reads the outgoing/revised values, so it runs before the write
+        engine.update(buffer, ts, high, low, close, volume)
+        buffer.upsert(ts, open_, high, low, close, volume, confirmed)
+
+        if engine.needs_resync:
+            engine.rebuild(buffer)
+
+        if confirmed:
+            if self.cache:
+                self.cache.append(symbol, timeframe, ts, open_, high, low, close, volume)
+            for callback in self.bar_listeners:
+                try:
+                    callback(symbol, timeframe, ts)
+                except Exception as e:
+                    log.error(f"Error in bar listener: {e}")
+
+    def load_candles(self, symbol: str, timeframe: str, rows: List[List[str]]) -> int:
+        """
+        Bulk-load a page of raw OKX candle rows ([ts, o, h, l, c, vol, volCcy, volCcyQuote, confirm])
+        Rows may be in any order (OKX REST returns newest first) and may overlap
+        what is already buffered; they are parsed in one vectorized conversion,
+        merged, de-duplicated and sorted by timestamp. Returns the buffered count.
+        """
+        if symbol not in self.data:
+            self.initialize_symbol(symbol)
+        if not rows:
+            return len(self.data[symbol][timeframe])
+
+        try:
+            raw = np.array(rows, dtype=str)
+            ts = raw[:, 0].astype(np.int64)
+            ohlcv = raw[:, 1:6].astype(np.float64)
+            confirmed = raw[:, 8] == "1"
+        except Exception as e:
+            log.error(f"Error parsing candle rows for {symbol} ({timeframe}): {e}")
+            return len(self.data[symbol][timeframe])
+
+        self._load_arrays(symbol, timeframe, ts, ohlcv[:, 0], ohlcv[:, 1], ohlcv[:, 2], ohlcv[:, 3], ohlcv[:, 4], confirmed)
+        return len(self.data[symbol][timeframe])
+
+    def _load_arrays(self, symbol: str, timeframe: str, ts: np.ndarray, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, confirmed: np.ndarray, persist: bool = True):
+        """Merge column arrays into a series buffer with one copy, then rebuild its indicators"""
+        buffer = self.data[symbol][timeframe]
+
+        # Existing rows first, new rows last; on duplicate timestamps the new row wins
+        columns = [ts, open_, high, low, close, volume, confirmed]
+        if len(buffer) > 0:
+            existing = [buffer.ts, buffer.open, buffer.high, buffer.low, buffer.close, buffer.volume, buffer.confirmed]
+            columns = [np.concatenate((old, new)) for old, new in zip(existing, columns)]
+
+        # np.unique keeps the first occurrence, so search the reversed arrays to keep the newest
+        reversed_ts = columns[0][::-1]
+        _, first = np.unique(reversed_ts, return_index=True)
+        order = len(reversed_ts) - 1 - first
+        columns = [col[order] for col in columns]
+
+        buffer.load(*columns)
+        self.indicators[symbol][timeframe].rebuild(buffer)
+
+        if persist and self.cache:
+            done = columns[6]
+            records = np.empty(int(done.sum()), dtype=CANDLE_DTYPE)
+            for name, col in zip(("ts", "open", "high", "low", "close", "volume"), columns[:6]):
+                records[name] = col[done]
+            self.cache.extend(symbol, timeframe, records)
+
+    def restore_from_cache(self, symbols: List[str]) -> Dict[Tuple[str, str], int]:
+        """
+        Restore candle buffers from the on-disk cache
+        Returns {(symbol, timeframe): newest cached timestamp} for the series that were restored
+        """
+        restored = {}
+        if not self.cache:
+            return restored
+
+        for symbol in symbols:
+            self.initialize_symbol(symbol)
+            for tf in self.timeframes:
+                records = self.cache.load(symbol, tf, self.window_size)
+                if len(records) == 0:
+                    continue
+                self._load_arrays(
+                    symbol, tf, records['ts'], records['open'], records['high'], records['low'],
+                    records['close'], records['volume'], np.ones(len(records), dtype=np.bool_),
+                    persist=False
+                )
+                restored[(symbol, tf)] = int(records['ts'][-1])
+                log.info(f"Restored {len(records)} cached candles for {symbol} ({tf})")
+
+        return restored
+
+    def update_orderbook(self, symbol: str, raw_data: Dict) -> bool:
+        """Update orderbook snapshot; returns True if the top of book changed"""
+        return self.orderbook_store.update(symbol, raw_data)
+
+    def update_l2_orderbook(self, symbol: str, action: str, raw_data: Dict) -> bool:
+        """
+        Apply an incremental order book message (snapshot or update)
+        Returns False when the book is out of sync and the channel must be resubscribed
+        """
+        book = self.l2_books.get(symbol)
+        if book is None:
+            book = L2OrderBook(symbol)
+            self.l2_books[symbol] = book
+        ok = book.apply(action, raw_data)
+
+        # Mirror the top levels into the store; an unsynced book is stored empty
+        store = self.orderbook_store
+        if book.synced:
+            store.set_levels(symbol, *book.top(store.levels), book.timestamp)
         else:
-            dq.append(candle)
+            store.clear(symbol)
+        return ok
+
+    def get_orderbook(self, symbol: str) -> Dict:
+        """Latest book (books5 snapshot or top ORDERBOOK_DEPTH levels of the L2 book) as views into the store"""
+        return self.orderbook_store.get(symbol)
 
-    def update_orderbook(self, symbol: str, raw_data: Dict):
-        """Update orderbook snapshot"""
-        self.orderbooks[symbol] = DataProcessor.normalize_orderbook(raw_data)
+    def get_orderbook_batch(self, symbols: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Stacked books of several symbols for OrderBookAnalyzer.analyze_batch"""
+        return self.orderbook_store.batch(symbols)
 
     def update_ticker(self, symbol: str, raw_data: Dict):
         """Update ticker data"""
@@ -49,7 +203,8 @@ class MultiTimeframeManager:
     def get_consolidated_state(self, symbol: str) -> Dict:
         """
         Get consolidated state for AI analysis
-        Returns a dictionary containing lists of candles for all timeframes + current market state
+        Returns a dictionary containing the candle buffers for all timeframes + current market state
+        (buffers are shared, not copied - read their column views directly)
         """
         if symbol not in self.data:
             return {}
@@ -58,17 +213,22 @@ class MultiTimeframeManager:
             "symbol": symbol,
             "market_data": {
                 "ticker": self.tickers.get(symbol, {}),
-                "orderbook": self.orderbooks.get(symbol, {})
+                "orderbook": self.get_orderbook(symbol)
             },
             "candles": {}
         }
 
         for tf in self.timeframes:
-            candles_list = list(self.data[symbol][tf])
-            state["candles"][tf] = candles_list
+            state["candles"][tf] = self.data[symbol][tf]
 
         return state
 
+    def get_indicators(self, symbol: str) -> Dict[str, Dict]:
+        """Current indicator values for every timeframe of a symbol"""
+        if symbol not in self.indicators:
+            return {}
+        return {tf: engine.snapshot() for tf, engine in self.indicators[symbol].items()}
+
     def is_ready(self, symbol: str) -> bool:
         """Check if we have enough data for analysis"""
         if symbol not in self.data:
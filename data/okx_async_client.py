@@ -0,0 +1,285 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+from urllib.parse import urlencode
+import asyncio
+import aiohttp
+import numpy as np
+from config import Config
+from utils.logger import log
+from utils.http_pool import http_pool
+
+class AsyncOKXClient:
+    """
+    asyncio-native OKX v5 REST client with the same methods as OKXClient
+
+    Requests are signed with HMAC-SHA256 (timestamp + method + path + body)
+    and sent over the shared keep-alive pool, so awaiting an order no longer
+    blocks WebSocket reading. Demo trading adds the x-simulated-trading
+    header. Latency of every request is recorded per endpoint (see stats()).
+    Failures are returned as {"code": "-1", "msg": ...} like the SDK wrapper.
+    """
+
+    BASE_URL = "https://www.okx.com"
+    WINDOW = 100
+    # Max orders per /trade/batch-orders request
+    BATCH_ORDER_LIMIT = 20
+
+    def __init__(self, api_key: str = None, secret_key: str = None, passphrase: str = None, demo: bool = None):
+        self.api_key = api_key or Config.OKX_API_KEY
+        self.secret_key = secret_key or Config.OKX_SECRET_KEY
+        self.passphrase = passphrase or Config.OKX_PASSPHRASE
+        self.demo = Config.OKX_DEMO_TRADING if demo is None else demo
+        self.timeout = aiohttp.ClientTimeout(total=Config.OKX_REST_TIMEOUT)
+        # endpoint -> recent latencies (seconds) and request/error counts
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _timestamp() -> str:
+        """ISO 8601 UTC timestamp with milliseconds, as OKX expects"""
+        return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+    @staticmethod
+    def sign(secret_key: str, message: str) -> str:
+        """Base64 HMAC-SHA256 signature (REST requests and WebSocket login)"""
+        digest = hmac.new((secret_key or "").encode(), message.encode(), hashlib.sha256).digest()
+        return base64.b64encode(digest).decode()
+
+    def _sign(self, timestamp: str, method: str, request_path: str, body: str) -> str:
+        return self.sign(self.secret_key, f"{timestamp}{method}{request_path}{body}")
+
+    def _headers(self, method: str, request_path: str, body: str) -> Dict[str, str]:
+        timestamp = self._timestamp()
+        headers = {
+            "OK-ACCESS-KEY": self.api_key or "",
+            "OK-ACCESS-SIGN": self._sign(timestamp, method, request_path, body),
+            "OK-ACCESS-TIMESTAMP": timestamp,
+            "OK-ACCESS-PASSPHRASE": self.passphrase or "",
+            "Content-Type": "application/json"
+        }
+        if self.demo:
+            headers["x-simulated-trading"] = "1"
+        return headers
+
+    def _record(self, endpoint: str, latency: float, ok: bool):
+        if endpoint not in self.counters:
+            self.counters[endpoint] = {"requests": 0, "errors": 0}
+            self.latencies[endpoint] = deque(maxlen=self.WINDOW)
+        self.counters[endpoint]["requests"] += 1
+        if not ok:
+            self.counters[endpoint]["errors"] += 1
+        self.latencies[endpoint].append(latency)
+
+    async def _request(self, method: str, path: str, params: Optional[Dict] = None, body: Optional[Dict] = None) -> Dict:
+        """Signed request; returns the decoded OKX response or {"code": "-1", "msg": ...}"""
+        request_path = f"/api/v5{path}"
+        if params:
+            request_path += "?" + urlencode({k: v for k, v in params.items() if v is not None})
+        payload = json.dumps(body) if body is not None else ""
+
+        started = time.monotonic()
+        ok = False
+        try:
+            session = http_pool.session(self.BASE_URL)
+            async with session.request(method, self.BASE_URL + request_path, data=payload or None,
+                                       headers=self._headers(method, request_path, payload),
+                                       timeout=self.timeout) as response:
+                result = await response.json(content_type=None)
+            ok = isinstance(result, dict) and result.get("code") == "0"
+            if not isinstance(result, dict):
+                return {"code": "-1", "msg": f"Unexpected response type: {type(result)}"}
+            return result
+        except Exception as e:
+            log.error(f"OKX {method} {path} failed: {e}")
+            return {"code": "-1", "msg": str(e)}
+        finally:
+            latency = time.monotonic() - started
+            self._record(path, latency, ok)
+            log.debug(f"OKX {method} {path}: {latency * 1000:.0f}ms")
+
+    async def get_balance(self, currency: str = "USDT") -> float:
+        """Get account balance for a specific currency"""
+        try:
+            result = await self._request("GET", "/account/balance", params={"ccy": currency})
+            if result.get("code") != "0":
+                log.warning(f"OKX API returned code: {result.get('code')}, msg: {result.get('msg')}")
+                return 0.0
+
+            data = result.get("data") or []
+            details = data[0].get("details", []) if data else []
+            for detail in details:
+                if detail.get("ccy") == currency:
+                    avail_bal = detail.get("availBal", "0")
+                    try:
+                        balance = float(avail_bal)
+                        log.info(f"Retrieved balance: {balance} {currency}")
+                        return balance
+                    except (ValueError, TypeError):
+                        log.error(f"Could not convert balance to float: {avail_bal}")
+                        return 0.0
+
+            log.warning(f"Could not find {currency} in account details")
+            return 0.0
+
+        except Exception as e:
+            log.error(f"Exception getting balance: {e}")
+            return 0.0
+
+    @staticmethod
+    def order_args(instId: str, tdMode: str, side: str, ordType: str, sz: str, px: Optional[str] = None, slTriggerPx: Optional[str] = None, tpTriggerPx: Optional[str] = None) -> Dict:
+        """Request body of one order (tdMode: 'cash', 'cross', 'isolated')"""
+        args = {
+            "instId": instId,
+            "tdMode": tdMode,
+            "side": side.lower(),
+            "ordType": ordType.lower(),
+            "sz": sz
+        }
+        if px:
+            args["px"] = px
+
+        # Attach SL/TP if provided (market orders on trigger)
+        if slTriggerPx:
+            args["slTriggerPx"] = slTriggerPx
+            args["slOrdPx"] = "-1"
+        if tpTriggerPx:
+            args["tpTriggerPx"] = tpTriggerPx
+            args["tpOrdPx"] = "-1"
+        return args
+
+    async def place_order(self, instId: str, tdMode: str, side: str, ordType: str, sz: str, px: Optional[str] = None, slTriggerPx: Optional[str] = None, tpTriggerPx: Optional[str] = None) -> Dict:
+        """
+        Place an order
+        tdMode: 'cash', 'cross', 'isolated'
+        """
+        try:
+            args = self.order_args(instId, tdMode, side, ordType, sz, px, slTriggerPx, tpTriggerPx)
+            log.info(f"Placing order: {args}")
+
+            if Config.DRY_RUN:
+                log.info("DRY RUN: Order not placed")
+                return {"code": "0", "data": [{"ordId": "dry_run_id"}]}
+
+            result = await self._request("POST", "/trade/order", body=args)
+            if result.get("code") == "0":
+                log.info(f"Order placed successfully: {result['data'][0]['ordId']}")
+            else:
+                log.error(f"Order placement failed: {result}")
+            return result
+
+        except Exception as e:
+            log.error(f"Exception placing order: {e}")
+            return {"code": "-1", "msg": str(e)}
+
+    async def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        """
+        Place several orders (each a dict of place_order arguments) through
+        /trade/batch-orders, BATCH_ORDER_LIMIT per request, requests sent concurrently
+        Returns one place_order-style result per order, in the same order
+        """
+        bodies = [self.order_args(**order) for order in orders]
+        for body in bodies:
+            log.info(f"Placing order: {body}")
+
+        if Config.DRY_RUN:
+            log.info(f"DRY RUN: {len(bodies)} orders not placed")
+            return [{"code": "0", "data": [{"ordId": "dry_run_id"}]} for _ in bodies]
+
+        chunks = [bodies[i:i + self.BATCH_ORDER_LIMIT] for i in range(0, len(bodies), self.BATCH_ORDER_LIMIT)]
+        responses = await asyncio.gather(*(self._request("POST", "/trade/batch-orders", body=chunk) for chunk in chunks))
+
+        results = []
+        for chunk, response in zip(chunks, responses):
+            data = response.get("data") or []
+            for i, body in enumerate(chunk):
+                if i < len(data):
+                    # Per-order outcome: sCode/sMsg, whatever the overall code (0 all, 2 some, 1 none placed)
+                    item = data[i]
+                    result = {"code": item.get("sCode", "-1"), "msg": item.get("sMsg", ""), "data": [item]}
+                else:
+                    result = {"code": "-1", "msg": response.get("msg") or "No result for order"}
+                if result["code"] == "0":
+                    log.info(f"Order placed successfully: {body['instId']} {result['data'][0].get('ordId')}")
+                else:
+                    log.error(f"Order placement failed: {body['instId']} {result}")
+                results.append(result)
+        return results
+
+    async def cancel_order(self, instId: str, ordId: str) -> bool:
+        """Cancel an order"""
+        try:
+            if Config.DRY_RUN:
+                log.info(f"DRY RUN: Cancel order {ordId}")
+                return True
+
+            result = await self._request("POST", "/trade/cancel-order", body={"instId": instId, "ordId": ordId})
+            if result.get("code") == "0":
+                log.info(f"Order {ordId} cancelled")
+                return True
+            log.error(f"Failed to cancel order: {result}")
+            return False
+        except Exception as e:
+            log.error(f"Exception cancelling order: {e}")
+            return False
+
+    async def get_positions(self, instType: str = "SWAP") -> list:
+        """Get current positions"""
+        try:
+            # In SPOT mode, positions work differently - return empty for now
+            if Config.TRADING_MODE == "SPOT":
+                log.debug("SPOT mode - positions not tracked via this endpoint")
+                return []
+
+            if Config.DRY_RUN:
+                log.debug(f"DRY RUN: Returning empty positions list")
+                return []
+
+            result = await self._request("GET", "/account/positions", params={"instType": instType})
+            if result.get("code") == "0":
+                positions = result.get("data", [])
+                if positions:
+                    log.debug(f"Retrieved {len(positions)} positions from OKX")
+                return positions
+
+            log.debug(f"API returned non-zero code: {result.get('code')}")
+            return []
+
+        except Exception as e:
+            log.debug(f"Exception getting positions (non-critical): {e}")
+            return []
+
+    async def set_leverage(self, instId: str, lever: int, mgnMode: str = "cross") -> bool:
+        """Set leverage for a trading pair"""
+        try:
+            if Config.DRY_RUN:
+                log.info(f"DRY RUN: Would set leverage to {lever}x for {instId}")
+                return True
+
+            result = await self._request("POST", "/account/set-leverage",
+                                         body={"instId": instId, "lever": str(lever), "mgnMode": mgnMode})
+            if result.get("code") == "0":
+                log.info(f"Leverage set to {lever}x for {instId}")
+                return True
+            log.warning(f"Failed to set leverage: {result}")
+            return False
+
+        except Exception as e:
+            log.error(f"Error setting leverage: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Dict]:
+        """Request count, error count and p50/p95 latency (ms) per endpoint"""
+        return {
+            endpoint: {
+                **counters,
+                "p50_ms": float(np.percentile(self.latencies[endpoint], 50)) * 1000,
+                "p95_ms": float(np.percentile(self.latencies[endpoint], 95)) * 1000
+            }
+            for endpoint, counters in self.counters.items()
+        }
@@ -1,7 +1,7 @@
-import requests
 from typing import List, Dict, Optional
 from config import Config
 from utils.logger import log
+from utils.http_pool import http_pool
 
 class OKXMarketData:
     """REST API client for OKX market data"""
@@ -30,7 +30,7 @@ class OKXMarketData:
                 "limit": limit
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = http_pool.sync_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -74,7 +74,7 @@ class OKXMarketData:
             url = f"{self.base_url}/public/instruments"
             params = {"instType": inst_type}
             
-            response = requests.get(url, params=params, timeout=10)
+            response = http_pool.sync_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
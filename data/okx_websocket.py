@@ -5,21 +5,37 @@ import websockets
 from typing import List, Dict, Callable, Optional
 from config import Config
 from utils.logger import log
+from data.ws_dispatcher import ChannelDispatcher, CallbackRegistry
+from data.ws_decoder import FrameDecoder
+from data.okx_async_client import AsyncOKXClient
 
 class OKXWebSocket:
-    def __init__(self):
-        self.url = "wss://wspap.okx.com:8443/ws/v5/public" if Config.OKX_DEMO_TRADING else "wss://ws.okx.com:8443/ws/v5/public"
+    # Max channels per subscribe request
+    SUBSCRIBE_CHUNK = 100
+
+    def __init__(self, endpoint: str = "public", registry: Optional[CallbackRegistry] = None, dispatcher: Optional[ChannelDispatcher] = None):
+        # endpoint: "public" (books, tickers, trades), "business" (candles) or "private" (account, positions, orders; logs in first)
+        # registry/dispatcher are passed in when several connections share one set of callbacks
+        host = "wss://wspap.okx.com:8443" if Config.OKX_DEMO_TRADING else "wss://ws.okx.com:8443"
+        self.url = f"{host}/ws/v5/{endpoint}"
+        self.private = endpoint == "private"
         self.ws = None
         self.running = False
-        self.callbacks: Dict[str, List[Callable]] = {}
+        self.registry = registry or CallbackRegistry()
+        self.decoder = FrameDecoder()
         self.subscriptions = []
         self.reconnect_delay = 5
+        # Callbacks run on per-channel consumer tasks, never inside the read loop
+        self.owns_dispatcher = dispatcher is None
+        self.dispatcher = dispatcher or ChannelDispatcher(self.registry.resolve, max_queue=Config.WS_QUEUE_SIZE)
 
     async def connect(self):
         """Establish WebSocket connection"""
         try:
             log.info(f"Connecting to OKX WebSocket: {self.url}")
             self.ws = await websockets.connect(self.url)
+            if self.private:
+                await self._login()
             self.running = True
             log.info("Connected to OKX WebSocket")
             
@@ -37,7 +53,7 @@ class OKXWebSocket:
             # Send Telegram notification for connection errors
             try:
                 import aiohttp
-                from config import Config
+                from utils.http_pool import http_pool
                 if hasattr(Config, 'TELEGRAM_BOT_TOKEN') and Config.TELEGRAM_BOT_TOKEN:
                     url = f"https://api.telegram.org/bot{Config.TELEGRAM_BOT_TOKEN}/sendMessage"
                     payload = {
@@ -45,13 +61,31 @@ class OKXWebSocket:
                         "text": f"🤖 <b>SCALPER BOT</b>\n⚠️ <b>CONNECTION ERROR</b>\n\n{error_msg}",
                         "parse_mode": "HTML"
                     }
-                    async with aiohttp.ClientSession() as session:
-                        await session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=5))
+                    async with http_pool.session(url).post(url, json=payload, timeout=aiohttp.ClientTimeout(total=5)):
+                        pass
             except:
                 pass
             
             await self._reconnect()
 
+    async def _login(self, timeout: float = 10.0):
+        """Authenticate a private connection (must succeed before subscribing)"""
+        timestamp = str(int(time.time()))
+        msg = {
+            "op": "login",
+            "args": [{
+                "apiKey": Config.OKX_API_KEY,
+                "passphrase": Config.OKX_PASSPHRASE,
+                "timestamp": timestamp,
+                "sign": AsyncOKXClient.sign(Config.OKX_SECRET_KEY, f"{timestamp}GET/users/self/verify")
+            }]
+        }
+        await self.ws.send(json.dumps(msg))
+        response = json.loads(await asyncio.wait_for(self.ws.recv(), timeout))
+        if response.get("event") != "login" or response.get("code") != "0":
+            raise ConnectionError(f"WebSocket login failed: {response}")
+        log.info("Logged in to OKX private WebSocket")
+
     async def _reconnect(self):
         """Handle reconnection logic"""
         self.running = False
@@ -69,25 +103,45 @@ class OKXWebSocket:
             await self._subscribe(channels)
 
     async def _subscribe(self, channels: List[Dict]):
-        """Internal subscription method"""
-        msg = {
-            "op": "subscribe",
-            "args": channels
-        }
-        await self.ws.send(json.dumps(msg))
+        """Internal subscription method (chunked to stay under OKX's request size limit)"""
+        for i in range(0, len(channels), self.SUBSCRIBE_CHUNK):
+            msg = {
+                "op": "subscribe",
+                "args": channels[i:i + self.SUBSCRIBE_CHUNK]
+            }
+            await self.ws.send(json.dumps(msg))
         log.info(f"Subscribed to {len(channels)} channels")
 
+    async def resubscribe(self, channels: List[Dict]):
+        """Unsubscribe and subscribe again to get a fresh snapshot (e.g. order book resync)"""
+        if not (self.running and self.ws):
+            return
+        await self.ws.send(json.dumps({"op": "unsubscribe", "args": channels}))
+        await self._subscribe(channels)
+
     async def _listen(self):
         """Listen for messages"""
         while self.running:
             try:
                 msg = await self.ws.recv()
                 
+                # Fast path: route data pushes on their leading arg without decoding
+                key = self.decoder.route(msg)
+                if key is not None:
+                    if not self.registry.resolve(*key):
+                        self.decoder.skipped += 1
+                        continue
+                    data = self.decoder.decode(msg)
+                    if "data" in data:
+                        # Hand off to the dispatcher; the full message (including 'arg') reaches the callbacks
+                        self.dispatcher.publish(key[0], key[1], data)
+                    continue
+                
                 # Handle non-JSON messages (like "pong")
                 if not msg or not msg.strip().startswith('{'):
                     continue
                 
-                data = json.loads(msg)
+                data = self.decoder.decode(msg)
                 
                 if "event" in data:
                     if data["event"] == "subscribe":
@@ -96,28 +150,6 @@ class OKXWebSocket:
                         log.error(f"WebSocket error: {data}")
                     continue
 
-                if "data" in data and "arg" in data:
-                    channel = data["arg"]["channel"]
-                    inst_id = data["arg"]["instId"]
-                    # Dispatch to callbacks
-                    key = f"{channel}:{inst_id}"
-                    
-                    # Pass full data context including 'arg' so we know the channel
-                    if key in self.callbacks:
-                        for callback in self.callbacks[key]:
-                            await callback(data)
-                    
-                    # Also dispatch to general channel callbacks
-                    if channel in self.callbacks:
-                        for callback in self.callbacks[channel]:
-                            await callback(data)
-                    
-                    # Dispatch to general 'candle' callback if it's a candle channel
-                    if channel.startswith("candle"):
-                        if "candle" in self.callbacks:
-                            for callback in self.callbacks["candle"]:
-                                await callback(data)
-
             except websockets.ConnectionClosed:
                 log.warning("WebSocket connection closed")
                 await self._reconnect()
@@ -142,13 +174,12 @@ class OKXWebSocket:
 
     def add_callback(self, channel: str, inst_id: Optional[str], callback: Callable):
         """Register a callback for data updates"""
-        key = f"{channel}:{inst_id}" if inst_id else channel
-        if key not in self.callbacks:
-            self.callbacks[key] = []
-        self.callbacks[key].append(callback)
+        self.registry.add(channel, inst_id, callback)
 
     async def close(self):
         """Close connection"""
         self.running = False
         if self.ws:
             await self.ws.close()
+        if self.owns_dispatcher:
+            await self.dispatcher.stop()
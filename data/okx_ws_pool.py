@@ -0,0 +1,122 @@
+import asyncio
+from typing import Callable, Dict, List, Optional
+from config import Config
+from utils.logger import log
+from data.okx_websocket import OKXWebSocket
+from data.ws_dispatcher import ChannelDispatcher, CallbackRegistry
+
+class OKXWebSocketPool:
+    """
+    Spreads subscriptions over several OKX WebSocket connections (shards)
+
+    All channels of one instrument stay on the same shard, and each new
+    instrument goes to the shard with the lowest load (weighted by how chatty
+    its channels are). A shard is opened when all existing ones are full.
+    Every shard reconnects and resubscribes on its own, while all of them
+    share one callback registry and dispatcher, so a dropped connection only
+    pauses the instruments on that shard.
+    Exposes the same connect/subscribe/add_callback/close surface as OKXWebSocket.
+    """
+
+    # Relative message rate per channel, used as subscription load
+    CHANNEL_WEIGHTS = {
+        "books": 4,
+        "books-l2-tbt": 4,
+        "books50-l2-tbt": 4,
+        "bbo-tbt": 4,
+        "books5": 2,
+        "trades": 2,
+        "tickers": 1,
+    }
+
+    def __init__(self, endpoint: str = "public", shard_capacity: int = None, max_shards: int = None):
+        self.endpoint = endpoint
+        self.shard_capacity = shard_capacity or Config.WS_SHARD_CAPACITY
+        self.max_shards = max_shards or Config.WS_MAX_SHARDS
+        self.registry = CallbackRegistry()
+        self.dispatcher = ChannelDispatcher(self.registry.resolve, max_queue=Config.WS_QUEUE_SIZE)
+        self.shards: List[OKXWebSocket] = []
+        self.loads: List[int] = []
+        # instId -> shard index
+        self.assignments: Dict[str, int] = {}
+        self.connected = False
+
+    def _weight(self, channel: Dict) -> int:
+        return self.CHANNEL_WEIGHTS.get(channel.get("channel", ""), 1)
+
+    def _new_shard(self) -> int:
+        shard = OKXWebSocket(self.endpoint, registry=self.registry, dispatcher=self.dispatcher)
+        self.shards.append(shard)
+        self.loads.append(0)
+        if self.connected:
+            asyncio.create_task(shard.connect())
+        log.info(f"Opened WebSocket shard {len(self.shards) - 1} ({self.endpoint})")
+        return len(self.shards) - 1
+
+    def _pick_shard(self, weight: int) -> int:
+        """Least loaded shard with room, opening a new one if all are full"""
+        if self.shards:
+            index = min(range(len(self.shards)), key=lambda i: self.loads[i])
+            if self.loads[index] + weight <= self.shard_capacity or len(self.shards) >= self.max_shards:
+                return index
+        return self._new_shard()
+
+    async def connect(self, timeout: float = 10.0):
+        """Connect all shards; a shard still retrying after `timeout` keeps doing so in the background"""
+        self.connected = True
+        if not self.shards:
+            self._new_shard()
+            return
+        tasks = [asyncio.create_task(shard.connect()) for shard in self.shards]
+        await asyncio.wait(tasks, timeout=timeout)
+
+    async def subscribe(self, channels: List[Dict]):
+        """Assign channels to shards by instrument and subscribe on each shard"""
+        per_shard: Dict[int, List[Dict]] = {}
+        by_inst: Dict[str, List[Dict]] = {}
+        for channel in channels:
+            by_inst.setdefault(channel.get("instId", ""), []).append(channel)
+
+        for inst_id, inst_channels in by_inst.items():
+            weight = sum(self._weight(c) for c in inst_channels)
+            index = self.assignments.get(inst_id)
+            if index is None:
+                index = self._pick_shard(weight)
+                self.assignments[inst_id] = index
+            self.loads[index] += weight
+            per_shard.setdefault(index, []).extend(inst_channels)
+
+        for index, shard_channels in per_shard.items():
+            await self.shards[index].subscribe(shard_channels)
+
+    async def resubscribe(self, channels: List[Dict]):
+        """Resubscribe channels on the shards that carry them"""
+        for channel in channels:
+            shard = self.shard_for(channel.get("instId", ""))
+            if shard:
+                await shard.resubscribe([channel])
+
+    def add_callback(self, channel: str, inst_id: Optional[str], callback: Callable):
+        """Register a callback for data updates (shared by all shards)"""
+        self.registry.add(channel, inst_id, callback)
+
+    def shard_for(self, inst_id: str) -> Optional[OKXWebSocket]:
+        """Connection carrying an instrument's subscriptions"""
+        index = self.assignments.get(inst_id)
+        return self.shards[index] if index is not None else None
+
+    def stats(self) -> List[Dict]:
+        """Per-shard load, instrument count and connection state"""
+        counts = [0] * len(self.shards)
+        for index in self.assignments.values():
+            counts[index] += 1
+        return [
+            {"shard": i, "load": self.loads[i], "instruments": counts[i], "connected": shard.running}
+            for i, shard in enumerate(self.shards)
+        ]
+
+    async def close(self):
+        """Close every shard and stop the shared dispatcher"""
+        self.connected = False
+        await asyncio.gather(*(shard.close() for shard in self.shards), return_exceptions=True)
+        await self.dispatcher.stop()
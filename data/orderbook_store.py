@@ -0,0 +1,152 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from utils.logger import log
+
+class OrderBookStore:
+    """
+    Latest order book of every symbol in preallocated numpy arrays
+
+    Each symbol owns one row of shared (symbols x levels x 2) [price, size]
+    bid and ask arrays that is overwritten in place on every push, so no
+    per-message lists are allocated. Every write bumps the row's version and
+    records which levels changed; top_version only moves when the best bid or
+    ask changed, letting consumers skip work while the top of book is still.
+    """
+
+    def __init__(self, levels: int = 20, capacity: int = 16):
+        self.levels = levels
+        self.index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._allocate(capacity)
+        # Parse scratch for raw pushes, reused across messages
+        self._scratch = np.zeros((2, levels, 2), dtype=np.float64)
+
+    def _allocate(self, capacity: int):
+        """(Re)allocate row storage, keeping existing rows"""
+        old = getattr(self, "bids", None)
+        count = len(self.symbols)
+        arrays = {
+            "bids": np.zeros((capacity, self.levels, 2), dtype=np.float64),
+            "asks": np.zeros((capacity, self.levels, 2), dtype=np.float64),
+            "bid_depth": np.zeros(capacity, dtype=np.int64),
+            "ask_depth": np.zeros(capacity, dtype=np.int64),
+            "timestamps": np.zeros(capacity, dtype=np.int64),
+            "versions": np.zeros(capacity, dtype=np.int64),
+            "top_versions": np.zeros(capacity, dtype=np.int64),
+            # Levels touched by the last write: [row, 0=bids/1=asks, level]
+            "changed": np.zeros((capacity, 2, self.levels), dtype=bool),
+        }
+        for name, array in arrays.items():
+            if old is not None:
+                array[:count] = getattr(self, name)[:count]
+            setattr(self, name, array)
+
+    def row(self, symbol: str) -> int:
+        """Row index of a symbol, allocating one on first use"""
+        index = self.index.get(symbol)
+        if index is None:
+            index = len(self.symbols)
+            if index == len(self.versions):
+                self._allocate(index * 2)
+            self.index[symbol] = index
+            self.symbols.append(symbol)
+        return index
+
+    def update(self, symbol: str, data: Dict) -> bool:
+        """
+        Write a raw OKX book push (books5 / snapshot format) in place
+        Returns True if the top of book changed
+        """
+        try:
+            scratch = self._scratch
+            depths = []
+            for side, levels in enumerate((data.get("bids", []), data.get("asks", []))):
+                n = min(len(levels), self.levels)
+                dest = scratch[side]
+                for i in range(n):
+                    # OKX levels are [price, size, liquidated_orders, num_orders]
+                    dest[i, 0] = float(levels[i][0])
+                    dest[i, 1] = float(levels[i][1])
+                depths.append(n)
+            return self._write(self.row(symbol), scratch[0, :depths[0]], scratch[1, :depths[1]], int(data.get("ts", 0)))
+        except Exception as e:
+            log.error(f"Error storing orderbook for {symbol}: {e}")
+            return False
+
+    def set_levels(self, symbol: str, bids: np.ndarray, asks: np.ndarray, timestamp: int) -> bool:
+        """Write already-parsed (n, 2) level arrays, e.g. the top of an L2 book; returns True if the top changed"""
+        return self._write(self.row(symbol), bids[:self.levels], asks[:self.levels], timestamp)
+
+    def clear(self, symbol: str):
+        """Empty a symbol's book (e.g. while it resyncs); no-op if already empty"""
+        index = self.index.get(symbol)
+        if index is not None and (self.bid_depth[index] or self.ask_depth[index]):
+            self._write(index, self._scratch[0, :0], self._scratch[1, :0], int(self.timestamps[index]))
+
+    def _write(self, row: int, bids: np.ndarray, asks: np.ndarray, timestamp: int) -> bool:
+        """Diff against the stored row, then overwrite it in place"""
+        for side, (levels, store, depths) in enumerate(((bids, self.bids, self.bid_depth), (asks, self.asks, self.ask_depth))):
+            n = len(levels)
+            old_n = int(depths[row])
+            stored = store[row]
+            changed = self.changed[row, side]
+            changed[:] = False
+            common = min(n, old_n)
+            np.any(stored[:common] != levels[:common], axis=1, out=changed[:common])
+            # Levels that appeared or disappeared
+            changed[common:max(n, old_n)] = True
+            stored[:n] = levels
+            stored[n:old_n] = 0.0
+            depths[row] = n
+
+        self.timestamps[row] = timestamp
+        self.versions[row] += 1
+        top_changed = bool(self.changed[row, 0, 0] or self.changed[row, 1, 0])
+        if top_changed:
+            self.top_versions[row] = self.versions[row]
+        return top_changed
+
+    def version(self, symbol: str) -> int:
+        """Write counter of a symbol's book (0 if never written)"""
+        index = self.index.get(symbol)
+        return int(self.versions[index]) if index is not None else 0
+
+    def top_version(self, symbol: str) -> int:
+        """Version at which the best bid or ask last changed"""
+        index = self.index.get(symbol)
+        return int(self.top_versions[index]) if index is not None else 0
+
+    def imbalance(self, symbol: str, levels: int = 10) -> float:
+        """(bid - ask) / (bid + ask) size of the top `levels` levels; 0 for an empty book"""
+        index = self.index.get(symbol)
+        if index is None:
+            return 0.0
+        bid_vol = self.bids[index, :min(levels, self.bid_depth[index]), 1].sum()
+        ask_vol = self.asks[index, :min(levels, self.ask_depth[index]), 1].sum()
+        total = bid_vol + ask_vol
+        return float((bid_vol - ask_vol) / total) if total > 0 else 0.0
+
+    def get(self, symbol: str) -> Dict:
+        """Book in the normalized orderbook format, as zero-copy views into the store"""
+        index = self.index.get(symbol)
+        if index is None or not self.versions[index]:
+            return {}
+        return {
+            "instId": symbol,
+            "bids": self.bids[index, :self.bid_depth[index]],
+            "asks": self.asks[index, :self.ask_depth[index]],
+            "timestamp": int(self.timestamps[index]),
+            "version": int(self.versions[index])
+        }
+
+    def batch(self, symbols: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stacked (bids, asks, bid_depth, ask_depth) for OrderBookAnalyzer.analyze_batch
+        Views when `symbols` is the store's own row order, copies otherwise
+        """
+        rows = [self.row(symbol) for symbol in symbols]
+        if rows == list(range(len(rows))):
+            n = len(rows)
+            return self.bids[:n], self.asks[:n], self.bid_depth[:n], self.ask_depth[:n]
+        rows = np.asarray(rows, dtype=np.int64)
+        return self.bids[rows], self.asks[rows], self.bid_depth[rows], self.ask_depth[rows]
@@ -0,0 +1,153 @@
+import asyncio
+import time
+import aiohttp
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from utils.logger import log
+from data.data_processor import DataProcessor
+from utils.http_pool import http_pool
+
+class RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per `per` seconds"""
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) * self.per / self.rate)
+
+
+class WarmupLoader:
+    """
+    Concurrent historical candle loader used at startup
+
+    Fetches every (symbol, timeframe) series over the shared keep-alive
+    session for the OKX host, with bounded concurrency. The newest page comes from /market/candles,
+    older pages from /market/history-candles, each behind its own OKX rate
+    limit. Rows are returned raw, in OKX order (newest first).
+    """
+
+    # OKX public limits (per IP): requests per 2 seconds and max rows per request
+    ENDPOINTS = {
+        "candles": {"path": "/market/candles", "rate": 40, "max_limit": 300},
+        "history": {"path": "/market/history-candles", "rate": 20, "max_limit": 100},
+    }
+
+    def __init__(self, concurrency: int = None):
+        self.base_url = "https://www.okx.com/api/v5"
+        self.concurrency = concurrency or Config.WARMUP_CONCURRENCY
+        self.limiters = {name: RateLimiter(ep["rate"], 2.0) for name, ep in self.ENDPOINTS.items()}
+        self.latencies: List[float] = []
+        self.timeout = aiohttp.ClientTimeout(total=10)
+
+    async def load(self, symbols: List[str], timeframes: List[str], limit: int = None, since: Dict[Tuple[str, str], int] = None) -> Dict[Tuple[str, str], List[List[str]]]:
+        """
+        Fetch `limit` candles for every symbol x timeframe
+        `since` maps a series to the newest timestamp already held (e.g. from
+        the candle cache); only bars after it are fetched for that series.
+        Returns {(symbol, timeframe): raw OKX rows, newest first}
+        """
+        limit = limit or Config.WARMUP_CANDLES
+        since = since or {}
+        now_ms = int(time.time() * 1000)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self.latencies = []
+        started = time.monotonic()
+        session = http_pool.session(self.base_url)
+
+        async def fetch(symbol: str, tf: str):
+            last_ts = since.get((symbol, tf))
+            series_limit = limit
+            if last_ts is not None:
+                # Bars opened after the cached one, plus the one still forming
+                missing = (now_ms - last_ts) // DataProcessor.timeframe_to_ms(tf) + 1
+                series_limit = max(1, min(limit, missing))
+            async with semaphore:
+                rows = await self.fetch_series(session, symbol, tf, series_limit, last_ts)
+                return (symbol, tf), rows
+
+        results = await asyncio.gather(
+            *(fetch(symbol, tf) for symbol in symbols for tf in timeframes)
+        )
+
+        elapsed = time.monotonic() - started
+        self._log_summary(elapsed, len(results))
+        return dict(results)
+
+    async def fetch_series(self, session: aiohttp.ClientSession, inst_id: str, bar: str, limit: int, since: Optional[int] = None) -> List[List[str]]:
+        """
+        Fetch up to `limit` rows for one series, paging back through history-candles
+        Stops once it reaches bars at or before `since`, which are dropped
+        """
+        rows: List[List[str]] = []
+        after: Optional[str] = None
+
+        while len(rows) < limit:
+            endpoint = "candles" if after is None else "history"
+            page_size = min(limit - len(rows), self.ENDPOINTS[endpoint]["max_limit"])
+            params = {"instId": inst_id, "bar": bar, "limit": str(page_size)}
+            if after is not None:
+                params["after"] = after
+
+            page = await self._request(session, endpoint, params)
+            if not page:
+                break
+
+            if since is not None and int(page[-1][0]) <= since:
+                rows.extend(row for row in page if int(row[0]) > since)
+                break
+
+            rows.extend(page)
+            after = page[-1][0]  # Oldest timestamp so far; OKX pages backwards from it
+            if len(page) < page_size:
+                break
+
+        log.info(f"Fetched {len(rows)} candles for {inst_id} ({bar})")
+        return rows
+
+    async def _request(self, session: aiohttp.ClientSession, endpoint: str, params: Dict) -> List[List[str]]:
+        """Single rate-limited GET; returns the data rows or [] on error"""
+        await self.limiters[endpoint].acquire()
+        url = f"{self.base_url}{self.ENDPOINTS[endpoint]['path']}"
+        started = time.monotonic()
+        try:
+            async with session.get(url, params=params, timeout=self.timeout) as response:
+                response.raise_for_status()
+                data = await response.json()
+        except Exception as e:
+            log.error(f"Error fetching candles for {params['instId']} ({params['bar']}): {e}")
+            return []
+        finally:
+            latency = time.monotonic() - started
+            self.latencies.append(latency)
+            log.debug(f"GET {self.ENDPOINTS[endpoint]['path']} {params['instId']} {params['bar']} took {latency * 1000:.0f}ms")
+
+        if data.get("code") != "0":
+            log.error(f"OKX API error: {data.get('msg')}")
+            return []
+        return data.get("data", [])
+
+    def _log_summary(self, elapsed: float, series: int):
+        """Log total warm-up time and request latency percentiles"""
+        if not self.latencies:
+            log.warning(f"Warm-up finished in {elapsed:.2f}s without any requests")
+            return
+        latencies = sorted(self.latencies)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        log.info(
+            f"Warm-up loaded {series} series with {len(latencies)} requests in {elapsed:.2f}s "
+            f"(latency p50={p50 * 1000:.0f}ms, p95={p95 * 1000:.0f}ms, max={latencies[-1] * 1000:.0f}ms)"
+        )
@@ -0,0 +1,72 @@
+import json
+import sys
+from typing import Dict, Optional, Tuple
+
+# Optional fast JSON backend
+try:
+    import orjson
+    _loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    _loads = json.loads
+    JSON_BACKEND = "json"
+
+# Every OKX push frame starts with its arg object, e.g.
+# {"arg":{"channel":"books5","instId":"BTC-USDT"},"data":[...]}
+_PUSH_PREFIX = '{"arg":{'
+_CHANNEL_FIELD = '"channel":"'
+_INST_FIELD = '"instId":"'
+
+class FrameDecoder:
+    """
+    Routes raw WebSocket frames before decoding them
+
+    route() reads (channel, instId) straight from the frame's leading arg
+    object and returns a pre-interned tuple key, cached per distinct arg
+    string, so the dispatcher can drop frames nobody listens to without
+    running the JSON parser. decode() uses orjson when installed.
+    """
+
+    def __init__(self):
+        # Raw arg text -> interned (channel, instId) key
+        self._keys: Dict[str, Tuple[str, str]] = {}
+        self.decoded = 0
+        self.skipped = 0
+
+    def route(self, raw: str) -> Optional[Tuple[str, str]]:
+        """(channel, instId) key of a push frame, or None for control/event frames"""
+        if not raw.startswith(_PUSH_PREFIX):
+            return None
+        end = raw.find("}", len(_PUSH_PREFIX))
+        if end < 0:
+            return None
+
+        arg = raw[len(_PUSH_PREFIX):end]
+        key = self._keys.get(arg)
+        if key is None:
+            key = self._parse_arg(arg)
+            if key is None:
+                return None
+            self._keys[arg] = key
+        return key
+
+    @staticmethod
+    def _parse_arg(arg: str) -> Optional[Tuple[str, str]]:
+        """Slow path for an arg string seen for the first time"""
+        start = arg.find(_CHANNEL_FIELD)
+        if start < 0:
+            return None
+        start += len(_CHANNEL_FIELD)
+        channel = arg[start:arg.find('"', start)]
+        # Private channels (account, positions, orders) have no instId
+        inst_start = arg.find(_INST_FIELD)
+        if inst_start < 0:
+            return (sys.intern(channel), "")
+        inst_start += len(_INST_FIELD)
+        inst_id = arg[inst_start:arg.find('"', inst_start)]
+        return (sys.intern(channel), sys.intern(inst_id))
+
+    def decode(self, raw: str) -> Dict:
+        """Parse a frame with the fastest available JSON backend"""
+        self.decoded += 1
+        return _loads(raw)
@@ -0,0 +1,138 @@
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.logger import log
+
+class CallbackRegistry:
+    """
+    Callback registry shared by every connection that feeds a dispatcher
+    Callbacks are keyed by (channel, instId); instId None means every instrument.
+    """
+
+    def __init__(self):
+        self.callbacks: Dict[Tuple[str, Optional[str]], List[Callable]] = {}
+        # Resolved handler list per routed (channel, instId) key, rebuilt when callbacks change
+        self.routes: Dict[Tuple[str, str], List[Callable]] = {}
+
+    def add(self, channel: str, inst_id: Optional[str], callback: Callable):
+        """Register a callback for data updates"""
+        key = (channel, inst_id or None)
+        if key not in self.callbacks:
+            self.callbacks[key] = []
+        self.callbacks[key].append(callback)
+        self.routes.clear()
+
+    def resolve(self, channel: str, inst_id: str) -> List[Callable]:
+        """Callbacks for a message: instrument-specific, channel-wide, then the general 'candle' ones"""
+        key = (channel, inst_id)
+        callbacks = self.routes.get(key)
+        if callbacks is None:
+            callbacks = list(self.callbacks.get(key, []))
+            callbacks.extend(self.callbacks.get((channel, None), []))
+            if channel.startswith("candle"):
+                callbacks.extend(self.callbacks.get(("candle", None), []))
+            self.routes[key] = callbacks
+        return callbacks
+
+
+class ChannelDispatcher:
+    """
+    Decouples the WebSocket read loop from message handlers
+
+    Each channel gets a bounded queue and its own consumer task, so publish()
+    never awaits strategy code. Snapshot channels (books5, tickers, ...) are
+    coalesced per instrument: while an update is still waiting to be
+    delivered, a newer one simply replaces it (latest value wins). Other
+    channels are delivered in order; when their queue is full the new
+    message is dropped and counted.
+    """
+
+    COALESCE_CHANNELS = {"books5", "bbo-tbt", "tickers"}
+
+    def __init__(self, resolve_callbacks: Callable[[str, str], List[Callable]], max_queue: int = 1000):
+        # resolve_callbacks(channel, inst_id) -> handlers registered for that message
+        self.resolve_callbacks = resolve_callbacks
+        self.max_queue = max_queue
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # Coalescing slots: {channel: {inst_id: latest message not yet delivered}}
+        self.pending: Dict[str, Dict[str, Dict]] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def publish(self, channel: str, inst_id: str, msg: Dict):
+        """Queue a message for delivery; never blocks"""
+        queue = self.queues.get(channel)
+        if queue is None:
+            queue = self._start_channel(channel)
+        counters = self.counters[channel]
+
+        if channel in self.COALESCE_CHANNELS:
+            slots = self.pending[channel]
+            if inst_id in slots:
+                # Already queued and not yet delivered: replace with the newer snapshot
+                slots[inst_id] = msg
+                counters["coalesced"] += 1
+                return
+            item = inst_id
+        else:
+            item = msg
+
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            counters["dropped"] += 1
+            return
+
+        if channel in self.COALESCE_CHANNELS:
+            self.pending[channel][inst_id] = msg
+        counters["enqueued"] += 1
+
+    def _start_channel(self, channel: str) -> asyncio.Queue:
+        """Create the queue and consumer task for a channel on first use"""
+        queue = asyncio.Queue(maxsize=self.max_queue)
+        self.queues[channel] = queue
+        self.pending[channel] = {}
+        self.counters[channel] = {"enqueued": 0, "coalesced": 0, "dropped": 0, "delivered": 0, "errors": 0}
+        self.tasks[channel] = asyncio.create_task(self._consume(channel, queue))
+        return queue
+
+    async def _consume(self, channel: str, queue: asyncio.Queue):
+        """Deliver queued messages of one channel to its callbacks"""
+        coalesce = channel in self.COALESCE_CHANNELS
+        slots = self.pending[channel]
+        counters = self.counters[channel]
+
+        while True:
+            item = await queue.get()
+            if coalesce:
+                inst_id = item
+                msg = slots.pop(inst_id, None)
+                if msg is None:
+                    continue
+            else:
+                msg = item
+                inst_id = msg.get("arg", {}).get("instId", "")
+
+            for callback in self.resolve_callbacks(channel, inst_id):
+                try:
+                    await callback(msg)
+                except Exception as e:
+                    counters["errors"] += 1
+                    log.error(f"Error in {channel} callback: {e}")
+            counters["delivered"] += 1
+
+    def stats(self, channel: Optional[str] = None) -> Dict:
+        """Counters and current queue depth, per channel (or for one channel)"""
+        channels = [channel] if channel else list(self.queues)
+        return {
+            ch: {**self.counters[ch], "depth": self.queues[ch].qsize()}
+            for ch in channels if ch in self.queues
+        }
+
+    async def stop(self):
+        """Cancel all consumer tasks"""
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        self.tasks.clear()
+        self.queues.clear()
+        self.pending.clear()
@@ -2,6 +2,7 @@ import aiohttp
 from typing import Optional, Dict
 from config import Config
 from utils.logger import log
+from utils.http_pool import http_pool
 import html
 
 def escape_html(text: str) -> str:
@@ -34,15 +35,15 @@ class TelegramNotifier:
                 "parse_mode": "HTML"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status == 200:
-                        log.debug("Telegram notification sent successfully")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        log.error(f"Telegram API error ({response.status}): {error_text}")
-                        return False
+            session = http_pool.session(url)
+            async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    log.debug("Telegram notification sent successfully")
+                    return True
+                else:
+                    error_text = await response.text()
+                    log.error(f"Telegram API error ({response.status}): {error_text}")
+                    return False
                         
         except Exception as e:
             log.error(f"Failed to send Telegram notification: {e}")
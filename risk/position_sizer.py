@@ -1,5 +1,6 @@
 from config import Config
 from utils.logger import log
+from data.instrument_registry import instrument_registry
 
 class PositionSizer:
     @staticmethod
@@ -18,8 +19,19 @@ class PositionSizer:
             # Calculate quantity
             quantity = leveraged_value_usd / entry_price
             
-            # TODO: Add symbol-specific precision rounding / min size checks here
-            # For now, return raw quantity
+            # Round down to the instrument's lot size (contracts for SWAP); below the minimum size there is no valid order
+            spec = instrument_registry.get(symbol)
+            if spec is not None:
+                if not spec.is_live:
+                    log.warning(f"{symbol} is not tradable (state: {spec.state})")
+                    return 0.0
+                size = spec.order_size(quantity)
+                if size <= 0:
+                    log.warning(f"{symbol}: Qty {quantity:.8f} is below the minimum order size ({spec.min_sz} x {spec.ct_val})")
+                    return 0.0
+                quantity = spec.base_quantity(size)
+            else:
+                log.warning(f"No instrument metadata for {symbol}, quantity not rounded")
             
             log.info(f"Position Sizing: Equity=${account_equity:.2f}, Size=${position_value_usd:.2f}, Lev=${leveraged_value_usd:.2f}, Qty={quantity:.6f}")
             
@@ -1,6 +1,8 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import asyncio
-from data.okx_client import OKXClient
+from data.okx_async_client import AsyncOKXClient
+from data.account_state import AccountState
+from data.instrument_registry import instrument_registry
 from risk.position_sizer import PositionSizer
 from risk.stop_loss_manager import StopLossManager
 from notifications.telegram_notifier import TelegramNotifier
@@ -8,8 +10,10 @@ from config import Config
 from utils.logger import log
 
 class OrderExecutor:
-    def __init__(self):
-        self.client = OKXClient()
+    def __init__(self, account_state: Optional[AccountState] = None):
+        self.client = AsyncOKXClient()
+        # Balances pushed by the private WebSocket; REST is used while they are missing, stale or disconnected
+        self.account_state = account_state
         self.telegram = TelegramNotifier()
         self.active_trades = {}  # Track active trades for close notifications
 
@@ -19,80 +23,26 @@ class OrderExecutor:
         """
         try:
             symbol = market_data['symbol']
-            action = signal['action']
-            entry_price = signal['entry_price']
-            stop_loss = signal['stop_loss']
-            take_profit = signal['take_profit']
             
             # 1. Get Account Balance
-            equity = self.client.get_balance("USDT")
+            equity = await self._get_equity()
             if equity <= 0:
-                error_msg = "Insufficient equity - balance check failed"
-                log.error(error_msg)
-                # Send Telegram notification
-                try:
-                    await self.telegram.notify_error(f"⚠️ {error_msg}")
-                except:
-                    pass
                 return False
 
-            # 2. Calculate Position Size
-            quantity = PositionSizer.calculate_position_size(equity, entry_price, symbol)
-            if quantity <= 0:
-                log.error("Invalid position size")
-                return False
-
-            # 3. Risk Check
-            if not PositionSizer.check_max_loss(equity, entry_price, stop_loss, quantity):
-                log.warning("Trade rejected by risk manager")
+            # 2-3. Size, risk-check and format the order
+            prepared = self._prepare_order(signal, market_data, equity)
+            if prepared is None:
                 return False
+            args, trade_data = prepared
 
             # 4. Set Leverage (for SWAP contracts)
             if Config.TRADING_MODE == "SWAP":
-                self._set_leverage(symbol, Config.LEVERAGE)
+                await self.client.set_leverage(symbol, Config.LEVERAGE)
 
             # 5. Place Order
-            notional_value = quantity * entry_price
-            sz = str(int(notional_value)) if Config.TRADING_MODE == "SWAP" else f"{quantity:.8f}"
-            
-            side = "buy" if action == "BUY" else "sell"
-            td_mode = "cross" if Config.TRADING_MODE == "SWAP" else "cash"
-            
-            result = self.client.place_order(
-                instId=symbol,
-                tdMode=td_mode,
-                side=side,
-                ordType="limit",
-                sz=sz,
-                px=str(entry_price),
-                slTriggerPx=str(stop_loss),
-                tpTriggerPx=str(take_profit)
-            )
-
+            result = await self.client.place_order(**args)
             if result.get("code") == "0":
-                order_id = result['data'][0]['ordId']
-                log.info(f"Trade executed: {action} {symbol} @ {entry_price}, Qty: {sz}, SL: {stop_loss}, TP: {take_profit}")
-                
-                # Send Telegram notification
-                trade_data = {
-                    'symbol': symbol,
-                    'action': action,
-                    'entry_price': entry_price,
-                    'stop_loss': stop_loss,
-                    'take_profit': take_profit,
-                    'size': sz,
-                    'risk_reward': signal.get('risk_reward', Config.RISK_REWARD_RATIO),
-                    'confidence': signal.get('confidence', 'N/A'),
-                    'reasoning': signal.get('reasoning', 'AI-based decision')
-                }
-                
-                # Store trade for later close notification
-                self.active_trades[order_id] = {
-                    **trade_data,
-                    'entry_time': asyncio.get_event_loop().time()
-                }
-                
-                await self.telegram.notify_trade_opened(trade_data)
+                await self._record_trade(result['data'][0]['ordId'], trade_data)
                 return True
             
             return False
@@ -102,6 +52,147 @@ class OrderExecutor:
             await self.telegram.notify_error(f"Trade execution error: {str(e)}")
             return False
 
+    async def execute_signals_async(self, signals: List[Tuple[Dict, Dict]], cycle: Optional[Dict] = None) -> Dict[str, bool]:
+        """
+        Execute several (signal, market_data) pairs of one analysis cycle together:
+        one equity snapshot for sizing, leverage set concurrently, and all orders
+        sent through the batch-orders endpoint
+        `cycle` (a dict owned by the caller, initially empty) carries the equity
+        snapshot and committed total across calls of the same cycle, e.g. when
+        decisions are streamed in one symbol at a time.
+        Returns {symbol: placed}
+        """
+        results = {market_data['symbol']: False for _, market_data in signals}
+        cycle = {} if cycle is None else cycle
+        try:
+            if not signals:
+                return results
+
+            # 1. One balance snapshot for the whole cycle
+            if cycle.get("equity") is None:
+                cycle["equity"] = await self._get_equity()
+                cycle["committed"] = 0.0
+            equity = cycle["equity"]
+            if equity <= 0:
+                return results
+
+            # 2-3. Size every signal; the cycle never commits more than the snapshot
+            prepared = []
+            budget = equity * Config.POSITION_SIZE_PERCENT
+            for signal, market_data in signals:
+                if cycle["committed"] + budget > equity:
+                    log.warning(f"Skipping {market_data['symbol']}: cycle already commits ${cycle['committed']:.2f} of ${equity:.2f}")
+                    continue
+                order = self._prepare_order(signal, market_data, equity)
+                if order is not None:
+                    prepared.append(order)
+                    cycle["committed"] += budget
+            if not prepared:
+                return results
+
+            # 4. Set Leverage (for SWAP contracts)
+            if Config.TRADING_MODE == "SWAP":
+                await asyncio.gather(*(self.client.set_leverage(args["instId"], Config.LEVERAGE) for args, _ in prepared))
+
+            # 5. Place all orders at once
+            placed = await self.client.place_orders([args for args, _ in prepared])
+            opened = []
+            for (args, trade_data), result in zip(prepared, placed):
+                if result.get("code") == "0":
+                    results[args["instId"]] = True
+                    opened.append(self._record_trade(result['data'][0]['ordId'], trade_data))
+                else:
+                    # Nothing was committed for a rejected order
+                    cycle["committed"] -= budget
+                    log.error(f"Order for {args['instId']} rejected: {result.get('msg')}")
+            await asyncio.gather(*opened)
+            return results
+
+        except Exception as e:
+            log.error(f"Error executing signals: {e}")
+            await self.telegram.notify_error(f"Trade execution error: {str(e)}")
+            return results
+
+    async def _get_equity(self) -> float:
+        """Available USDT: fresh pushed account state, else a REST call"""
+        equity = self.account_state.balance("USDT") if self.account_state else None
+        if equity is None:
+            equity = await self.client.get_balance("USDT")
+        if equity <= 0:
+            error_msg = "Insufficient equity - balance check failed"
+            log.error(error_msg)
+            # Send Telegram notification
+            try:
+                await self.telegram.notify_error(f"⚠️ {error_msg}")
+            except:
+                pass
+        return equity
+
+    def _prepare_order(self, signal: Dict, market_data: Dict, equity: float) -> Optional[Tuple[Dict, Dict]]:
+        """Size and risk-check a signal; returns (place_order arguments, trade data) or None"""
+        symbol = market_data['symbol']
+        action = signal['action']
+        entry_price = signal['entry_price']
+        stop_loss = signal['stop_loss']
+        take_profit = signal['take_profit']
+
+        # Calculate Position Size
+        quantity = PositionSizer.calculate_position_size(equity, entry_price, symbol)
+        if quantity <= 0:
+            log.error("Invalid position size")
+            return None
+
+        # Risk Check
+        if not PositionSizer.check_max_loss(equity, entry_price, stop_loss, quantity):
+            log.warning("Trade rejected by risk manager")
+            return None
+
+        # Size on the lot grid, prices on the tick grid
+        spec = instrument_registry.get(symbol)
+        if spec is not None:
+            sz = spec.format_size(spec.order_size(quantity))
+            px, sl_px, tp_px = (spec.format_price(p) for p in (entry_price, stop_loss, take_profit))
+        else:
+            log.warning(f"No instrument metadata for {symbol}, sending unrounded order")
+            notional_value = quantity * entry_price
+            sz = str(int(notional_value)) if Config.TRADING_MODE == "SWAP" else f"{quantity:.8f}"
+            px, sl_px, tp_px = str(entry_price), str(stop_loss), str(take_profit)
+
+        args = {
+            "instId": symbol,
+            "tdMode": "cross" if Config.TRADING_MODE == "SWAP" else "cash",
+            "side": "buy" if action == "BUY" else "sell",
+            "ordType": "limit",
+            "sz": sz,
+            "px": px,
+            "slTriggerPx": sl_px,
+            "tpTriggerPx": tp_px
+        }
+        trade_data = {
+            'symbol': symbol,
+            'action': action,
+            'entry_price': entry_price,
+            'stop_loss': stop_loss,
+            'take_profit': take_profit,
+            'size': sz,
+            'risk_reward': signal.get('risk_reward', Config.RISK_REWARD_RATIO),
+            'confidence': signal.get('confidence', 'N/A'),
+            'reasoning': signal.get('reasoning', 'AI-based decision')
+        }
+        return args, trade_data
+
+    async def _record_trade(self, order_id: str, trade_data: Dict):
+        """Remember a placed order for close notifications and announce it"""
+        log.info(f"Trade executed: {trade_data['action']} {trade_data['symbol']} @ {trade_data['entry_price']}, Qty: {trade_data['size']}, SL: {trade_data['stop_loss']}, TP: {trade_data['take_profit']}")
+        
+        # Store trade for later close notification
+        self.active_trades[order_id] = {
+            **trade_data,
+            'entry_time': asyncio.get_event_loop().time()
+        }
+        
+        await self.telegram.notify_trade_opened(trade_data)
+
     def execute_signal(self, signal: Dict, market_data: Dict) -> bool:
         """
         Synchronous wrapper for execute_signal_async
@@ -144,24 +235,29 @@ class OrderExecutor:
             await self.telegram.notify_trade_closed(close_data)
             del self.active_trades[order_id]
 
-    def _set_leverage(self, inst_id: str, leverage: int):
-        """Set leverage for a trading pair"""
-        try:
-            if Config.DRY_RUN:
-                log.info(f"DRY RUN: Would set leverage to {leverage}x for {inst_id}")
-                return
-            
-            # OKX API to set leverage
-            result = self.client.accountAPI.set_leverage(
-                instId=inst_id,
-                lever=str(leverage),
-                mgnMode="cross"
-            )
-            
-            if result.get("code") == "0":
-                log.info(f"Leverage set to {leverage}x for {inst_id}")
-            else:
-                log.warning(f"Failed to set leverage: {result}")
-                
-        except Exception as e:
-            log.error(f"Error setting leverage: {e}")
+    async def on_order_filled(self, order: Dict) -> Optional[str]:
+        """
+        Handle a fill pushed by the private orders channel
+        An opposite-side fill on a traded symbol (TP/SL or manual close) closes
+        that trade; returns the closed symbol, else None
+        """
+        order_id = order.get("ordId")
+        if order_id in self.active_trades:
+            log.info(f"Entry order {order_id} filled for {self.active_trades[order_id]['symbol']}")
+            return None
+
+        symbol = order.get("instId")
+        for entry_id, trade in self.active_trades.items():
+            closing_side = "sell" if trade['action'] == "BUY" else "buy"
+            if trade['symbol'] != symbol or order.get("side") != closing_side:
+                continue
+
+            exit_price = float(order.get("avgPx") or order.get("fillPx") or 0)
+            direction = 1 if trade['action'] == "BUY" else -1
+            entry_price = trade['entry_price']
+            pnl_percent = (exit_price - entry_price) / entry_price * 100 * direction if entry_price else 0.0
+            pnl = float(order.get("pnl") or 0)
+            log.info(f"Position closed: {symbol} @ {exit_price}, PnL: {pnl} ({pnl_percent:.2f}%)")
+            await self.close_position_async(entry_id, exit_price, pnl, pnl_percent)
+            return symbol
+        return None
@@ -0,0 +1,151 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+from utils.logger import log
+
+class EventScheduler:
+    """
+    Wakes the bot only when something happened
+
+    Two kinds of events:
+    - notify(symbol): something changed for a symbol (bar close, book
+      imbalance crossing, ...); the symbol is queued for analysis.
+    - timers: callbacks due at a wall-clock time, kept in a heap. A timer is
+      identified by a key; scheduling the same key again replaces it.
+
+    run() sleeps until the next timer is due or a symbol is notified. Symbols
+    notified within `batch_window` seconds of each other are handed to the
+    handler together, so one bar close across many symbols is one batch.
+    Handlers and async timer callbacks run as tasks, so a slow AI call never
+    delays timers or other symbols; a symbol whose batch is still in flight
+    stays queued until that batch is done, so it is never analyzed twice at once.
+    """
+
+    def __init__(self, batch_window: float = 0.05):
+        self.batch_window = batch_window
+        # (due, seq, key); entries whose seq no longer matches self._timers[key] are stale
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._timers: Dict[Hashable, Tuple[int, Callable]] = {}
+        self._seq = itertools.count()
+        self._pending: Set[str] = set()
+        # Symbols whose batch is being handled, and the running handler/timer tasks
+        self._in_flight: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self.running = False
+        self.counters = {"wakeups": 0, "timers_fired": 0, "notifications": 0, "batches": 0, "deferred": 0}
+
+    def call_at(self, when: float, key: Hashable, callback: Callable):
+        """Run callback() (sync or async) at wall-clock time `when`, replacing any timer with the same key"""
+        seq = next(self._seq)
+        self._timers[key] = (seq, callback)
+        heapq.heappush(self._heap, (when, seq, key))
+        self._wakeup.set()
+
+    def call_later(self, delay: float, key: Hashable, callback: Callable):
+        """Run callback() after `delay` seconds"""
+        self.call_at(time.time() + delay, key, callback)
+
+    def cancel(self, key: Hashable):
+        """Drop a pending timer (its heap entry is discarded lazily)"""
+        self._timers.pop(key, None)
+
+    def has_timer(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def notify(self, symbol: str):
+        """Queue a symbol for analysis"""
+        self.counters["notifications"] += 1
+        self._pending.add(symbol)
+        self._wakeup.set()
+
+    def _next_due(self) -> Optional[float]:
+        """Due time of the earliest live timer, dropping stale heap entries"""
+        heap = self._heap
+        while heap:
+            when, seq, key = heap[0]
+            entry = self._timers.get(key)
+            if entry is not None and entry[0] == seq:
+                return when
+            heapq.heappop(heap)
+        return None
+
+    def _ready(self) -> Set[str]:
+        """Pending symbols that are not already being handled"""
+        return self._pending - self._in_flight
+
+    def _spawn(self, coro: Awaitable, what: str, symbols: Set[str] = frozenset()):
+        """Run a handler or timer coroutine as a task; its symbols are in flight until it ends"""
+        async def runner():
+            try:
+                await coro
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Error in {what}: {e}")
+            finally:
+                self._in_flight -= symbols
+                if self._pending:
+                    # Symbols held back while this batch ran can go now
+                    self._wakeup.set()
+
+        self._in_flight |= symbols
+        task = asyncio.create_task(runner())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fire_due(self):
+        """Run every timer that is due (async callbacks as tasks)"""
+        now = time.time()
+        while True:
+            when = self._next_due()
+            if when is None or when > now:
+                return
+            _, _, key = heapq.heappop(self._heap)
+            _, callback = self._timers.pop(key)
+            self.counters["timers_fired"] += 1
+            try:
+                result = callback()
+                if asyncio.iscoroutine(result):
+                    self._spawn(result, f"scheduled task {key}")
+            except Exception as e:
+                log.error(f"Error in scheduled task {key}: {e}")
+
+    async def run(self, on_symbols: Callable[[Set[str]], Awaitable[None]]):
+        """Dispatch timers and notified symbols until stop() is called"""
+        self.running = True
+        while self.running:
+            when = self._next_due()
+            timeout = None if when is None else max(0.0, when - time.time())
+            if not self._ready():
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            if not self.running:
+                break
+            self.counters["wakeups"] += 1
+
+            await self._fire_due()
+
+            if self._ready():
+                # Let symbols notified by the same burst join this batch
+                await asyncio.sleep(self.batch_window)
+                symbols = self._ready()
+                self._pending -= symbols
+                self.counters["deferred"] += len(self._pending)
+                self.counters["batches"] += 1
+                self._spawn(on_symbols(symbols), "handling triggered symbols", symbols)
+
+    def stop(self):
+        """Stop run() at its next wakeup and cancel running handlers and timers"""
+        self.running = False
+        for task in list(self._tasks):
+            task.cancel()
+        self._wakeup.set()
+
+    def stats(self) -> Dict:
+        return {**self.counters, "timers": len(self._timers), "pending": len(self._pending), "in_flight": len(self._in_flight)}
@@ -0,0 +1,114 @@
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from config import Config
+from utils.logger import log
+
+class HTTPClientManager:
+    """
+    Process-wide pooled HTTP clients
+
+    One keep-alive aiohttp session per host (created lazily inside the running
+    event loop, so DNS/TCP/TLS setup is paid once per connection instead of
+    once per call), plus one requests.Session for the synchronous REST
+    clients. Connection create/reuse counts are collected per host through an
+    aiohttp TraceConfig. close_all() is awaited on bot shutdown.
+    """
+
+    def __init__(self, limit: int = None, limit_per_host: int = None, keepalive_timeout: float = None):
+        self.limit = limit or Config.HTTP_POOL_LIMIT
+        self.limit_per_host = limit_per_host or Config.HTTP_POOL_LIMIT_PER_HOST
+        self.keepalive_timeout = keepalive_timeout or Config.HTTP_KEEPALIVE_TIMEOUT
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self._sync_session: Optional[requests.Session] = None
+
+    @staticmethod
+    def _host(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _host_counters(self, host: str) -> Dict[str, int]:
+        if host not in self.counters:
+            self.counters[host] = {"requests": 0, "connections_created": 0, "connections_reused": 0, "sessions_created": 0}
+        return self.counters[host]
+
+    def _trace_config(self, counters: Dict[str, int]) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            counters["requests"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            counters["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            counters["connections_reused"] += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+
+    def session(self, url: str) -> aiohttp.ClientSession:
+        """Shared session for the host of `url` (must be called from the event loop)"""
+        host = self._host(url)
+        session = self.sessions.get(host)
+        if session is None or session.closed:
+            counters = self._host_counters(host)
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config(counters)])
+            self.sessions[host] = session
+            counters["sessions_created"] += 1
+        return session
+
+    def sync_session(self) -> requests.Session:
+        """Shared keep-alive requests.Session for synchronous clients"""
+        if self._sync_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.limit_per_host, pool_maxsize=self.limit_per_host)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+            def count(response, *args, **kwargs):
+                self._host_counters(self._host(response.url))["requests"] += 1
+
+            session.hooks["response"].append(count)
+            self._sync_session = session
+        return self._sync_session
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-host request and connection counters, plus open connections per async pool"""
+        stats = {}
+        for host, counters in self.counters.items():
+            entry = dict(counters)
+            session = self.sessions.get(host)
+            if session is not None and not session.closed:
+                # Idle keep-alive connections currently held by the pool
+                entry["pooled_connections"] = sum(len(conns) for conns in getattr(session.connector, "_conns", {}).values())
+            stats[host] = entry
+        return stats
+
+    async def close_all(self):
+        """Close every pooled session"""
+        for host, session in list(self.sessions.items()):
+            try:
+                await session.close()
+            except Exception as e:
+                log.error(f"Error closing HTTP session for {host}: {e}")
+        self.sessions.clear()
+        if self._sync_session is not None:
+            self._sync_session.close()
+            self._sync_session = None
+        log.info("HTTP connection pools closed")
+
+
+# Shared by every HTTP client in the process
+http_pool = HTTPClientManager()
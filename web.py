@@ -50,6 +50,48 @@ def stats():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/ws_stats')
+def ws_stats():
+    """WebSocket dispatch counters (enqueued/coalesced/dropped/depth per channel)"""
+    if not bot:
+        return jsonify({"error": "Bot not running"}), 503
+    stats = {"public": bot.ws.dispatcher.stats(), "public_shards": bot.ws.stats()}
+    if bot.candle_ws:
+        stats["business"] = bot.candle_ws.dispatcher.stats()
+        stats["business_shards"] = bot.candle_ws.stats()
+    return jsonify(stats)
+
+@app.route('/http_stats')
+def http_stats():
+    """Pooled HTTP client counters per host (requests, connections created/reused)"""
+    from utils.http_pool import http_pool
+    return jsonify(http_pool.stats())
+
+@app.route('/okx_stats')
+def okx_stats():
+    """OKX REST request counts and p50/p95 latency per endpoint"""
+    if not bot:
+        return jsonify({"error": "Bot not running"}), 503
+    return jsonify(bot.executor.client.stats())
+
+@app.route('/account')
+def account():
+    """Account state pushed by the private WebSocket (equity, balances, positions, live orders)"""
+    if not bot:
+        return jsonify({"error": "Bot not running"}), 503
+    return jsonify(bot.account_state.stats())
+
+@app.route('/ai_stats')
+def ai_stats():
+    """Per-model latency/error/breaker stats and decision cache counters"""
+    if not bot:
+        return jsonify({"error": "Bot not running"}), 503
+    engine = bot.decision_engine
+    return jsonify({
+        "models": engine.ai_client.router.stats(),
+        "decision_cache": engine.decision_cache.stats() if engine.decision_cache else None
+    })
+
 # Start bot thread when module is loaded (works with gunicorn)
 log.info("Initializing bot thread...")
 bot_thread = threading.Thread(target=run_bot, daemon=True)